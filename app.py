@@ -1,27 +1,101 @@
+import time
+_import_started = time.perf_counter()
+
 from flask import Flask, redirect, session, request, render_template, jsonify
-from db_services import create_tables
-from routes import signup_bp, login_bp, logout_bp, video_bp
+from db_services import ensure_tables
+from services.model_registry import timed_stage, record_stage, startup_timings, loaded_models, warm_up
+from services.instrumentation import configure_logging, render_prometheus
+from routes import signup_bp, login_bp, logout_bp, video_bp, live_bp, model_bp
+from routes.live_routes import live_socket
 import os
 import base64
+import logging
 import numpy as np
 import cv2
 
+try:
+    from flask_sock import Sock
+except ImportError:  # WebSocket live sessions are optional; HTTP sessions still work
+    Sock = None
+
 # Import the prediction function for live frame
-from services.yoga_model import process_live_frame
+from services.yoga_model import process_live_frame, process_live_landmarks, leased_pose
+from services.live_protocol import (
+    KEYPOINTS_CONTENT_TYPE, IMAGE_CONTENT_TYPES, LiveInputError,
+    decode_image_bytes, keypoints_from_bytes, keypoints_from_json
+)
+from services.pose_pool import PoseEstimatorPoolExhausted
+
+configure_logging()
+log = logging.getLogger(__name__)
 
 app = Flask(__name__)
 app.secret_key = 'hello123'
 
-create_tables()
-
 UPLOAD_FOLDER = os.path.join('static', 'videos')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Largest video accepted, checked before any bytes are buffered
+app.config['MAX_VIDEO_UPLOAD_BYTES'] = int(os.environ.get('MAX_VIDEO_UPLOAD_BYTES', 500 * 1024 * 1024))
+
+# Video analysis sampling: analyze every Nth frame, or resample to a target fps (None = native)
+app.config['ANALYSIS_FRAME_STRIDE'] = int(os.environ.get('ANALYSIS_FRAME_STRIDE', 1))
+app.config['ANALYSIS_TARGET_FPS'] = float(os.environ['ANALYSIS_TARGET_FPS']) if os.environ.get('ANALYSIS_TARGET_FPS') else None
+# Opt-in early exit: stop decoding once the vote is this many standard errors from changing (e.g. 3)
+app.config['ANALYSIS_EARLY_EXIT_Z'] = float(os.environ['ANALYSIS_EARLY_EXIT_Z']) if os.environ.get('ANALYSIS_EARLY_EXIT_Z') else None
+# Split long videos into segments analyzed on a process pool (one Pose + models per worker)
+app.config['ANALYSIS_USE_PROCESS_POOL'] = os.environ.get('ANALYSIS_USE_PROCESS_POOL') == '1'
+# Transcode uploads into a small, low-fps proxy in the background and analyze that instead
+app.config['ANALYSIS_USE_PROXY'] = os.environ.get('ANALYSIS_USE_PROXY', '1') == '1'
+# Background analysis jobs: concurrent analyses and how many more may wait before we reject
+app.config['ANALYSIS_MAX_WORKERS'] = int(os.environ.get('ANALYSIS_MAX_WORKERS', 2))
+app.config['ANALYSIS_MAX_QUEUED'] = int(os.environ.get('ANALYSIS_MAX_QUEUED', 8))
+# Operator token for reloading / activating model versions over HTTP (unset = disabled)
+app.config['MODEL_ADMIN_TOKEN'] = os.environ.get('MODEL_ADMIN_TOKEN')
 
 app.register_blueprint(signup_bp)
 app.register_blueprint(login_bp)
 app.register_blueprint(logout_bp)
 app.register_blueprint(video_bp)
+app.register_blueprint(live_bp)
+app.register_blueprint(model_bp)
+
+if Sock is not None:
+    sock = Sock(app)
+    sock.route('/live/ws')(live_socket)
+
+_tables_checked = False
+
+
+@app.before_request
+def prepare_database():
+    # Schema setup happens on the first request instead of at import
+    global _tables_checked
+    if not _tables_checked:
+        with timed_stage("create_tables"):
+            ensure_tables()
+        _tables_checked = True
+
+
+def _warm_pose_graph():
+    with leased_pose():
+        pass
+
+
+# Optional: load the classifiers and build one Pose graph in the background at startup
+if os.environ.get('MODEL_WARMUP') == '1':
+    warm_up(extra=_warm_pose_graph)
+
+
+@app.route('/health/startup')
+def startup_health():
+    return jsonify({"timings": startup_timings(), "models_loaded": loaded_models()})
+
+@app.route('/metrics')
+def metrics():
+    """Per-stage latency histograms in the Prometheus text format."""
+    return app.response_class(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 
 @app.route('/camera')
 def camera_page():
@@ -32,13 +106,21 @@ def camera_page():
 def home():
     return render_template('home.html')
 
+
+# Only dynamic pages and API answers are kept out of caches; media and static files set
+# their own validators and Cache-Control
+NO_STORE_MIMETYPES = ('text/html', 'application/json')
+
+
 @app.after_request
 def add_header(response):
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+    if response.mimetype in NO_STORE_MIMETYPES:
+        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+        response.headers['Pragma'] = 'no-cache'
+        response.headers['Expires'] = '0'
     return response
 
+
 @app.route('/predict_live_frame', methods=['POST'])
 def predict_live_frame_route():
     try:
@@ -55,10 +137,38 @@ def predict_live_frame_route():
         result = process_live_frame(frame)  # ✅ must return a list of strings
         return jsonify({ "feedback": result })  # ✅ wrap in a dict
     except Exception as e:
-        print("❌ Error in /predict_live_frame:", str(e))
+        log.exception("Error in /predict_live_frame")
         return jsonify({"feedback": [f"Error: {str(e)}"]}), 500
 
 
+@app.route('/predict_live', methods=['POST'])
+def predict_live_route():
+    """
+    Compact live endpoint: a raw binary image body (no base64/JSON), or client-side
+    keypoints which skip image decode and pose estimation entirely.
+    """
+    content_type = request.mimetype
+    try:
+        if content_type == KEYPOINTS_CONTENT_TYPE:
+            result = process_live_landmarks(keypoints_from_bytes(request.get_data()))
+        elif content_type == 'application/json':
+            result = process_live_landmarks(keypoints_from_json(request.get_json() or {}))
+        elif content_type in IMAGE_CONTENT_TYPES:
+            result = process_live_frame(decode_image_bytes(request.get_data()))
+        else:
+            return jsonify({"feedback": [f"Unsupported content type: {content_type}"]}), 415
+        return jsonify({"feedback": result})
+    except LiveInputError as e:
+        return jsonify({"feedback": [f"Error: {str(e)}"]}), 400
+    except PoseEstimatorPoolExhausted as e:
+        return jsonify({"feedback": [f"Error: {str(e)}"]}), 503
+    except Exception as e:
+        log.exception("Error in /predict_live")
+        return jsonify({"feedback": [f"Error: {str(e)}"]}), 500
+
+
+record_stage("app_import", time.perf_counter() - _import_started)
+
 if __name__ == '__main__':
-    print("✅ Flask app starting on http://127.0.0.1:5000")
+    log.info("Flask app starting on http://127.0.0.1:5000")
     app.run(debug=True, host="127.0.0.1", port=5000)
@@ -0,0 +1,99 @@
+"""
+Run the whole benchmark suite and save one JSON file per run.
+
+    python -m benchmarks                       # writes benchmarks/results/<timestamp>.json
+    python -m benchmarks --only db_concurrency web --quick
+    python -m benchmarks --compare benchmarks/results/<earlier>.json
+
+--compare prints, for every numeric metric present in both runs, the new/old ratio.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import traceback
+
+from benchmarks import common  # noqa: F401  (sets DB_PATH before any db import)
+from benchmarks.common import RESULTS_DIR, run_metadata, write_result
+
+SUITES = ("db_connections", "db_concurrency", "logins", "landmarks", "inference", "web")
+
+
+def _run_suite(name, quick):
+    if name == "db_connections":
+        from benchmarks import db_connections
+        return db_connections.run(seconds=1.0 if quick else 3.0)
+    if name == "db_concurrency":
+        from benchmarks import db_concurrency
+        return db_concurrency.run(seconds=1.0 if quick else 3.0)
+    if name == "logins":
+        from benchmarks import logins
+        return logins.run(seconds=1.0 if quick else 3.0)
+    if name == "landmarks":
+        from benchmarks import landmarks
+        return landmarks.run(iterations=2000 if quick else 20000)
+    if name == "inference":
+        from benchmarks import inference
+        return inference.run(seconds=2.0 if quick else 5.0, live_iterations=30 if quick else 200)
+    if name == "web":
+        from benchmarks import web
+        return web.run(iterations=30 if quick else 200)
+    raise ValueError(f"Unknown benchmark: {name}")
+
+
+def _flatten(data, prefix=""):
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(previous, current):
+    """{metric: {"before", "after", "ratio"}} for numeric metrics found in both results."""
+    before = _flatten({k: v for k, v in previous.items() if k != "meta"})
+    after = _flatten({k: v for k, v in current.items() if k != "meta"})
+    return {
+        path: {"before": before[path], "after": after[path],
+               "ratio": round(after[path] / before[path], 3) if before[path] else None}
+        for path in sorted(before.keys() & after.keys())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--only', nargs='+', choices=SUITES, help="run only these benchmarks")
+    parser.add_argument('--quick', action='store_true', help="shorter runs, for a smoke check")
+    parser.add_argument('--output', help="result file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="an earlier result file to compare against")
+    args = parser.parse_args()
+
+    result = {"benchmark": "suite", "meta": run_metadata()}
+    failed = []
+    for name in args.only or SUITES:
+        try:
+            result[name] = _run_suite(name, args.quick)
+        except Exception as e:  # one broken path (e.g. no models on this machine) must not lose the rest
+            result[name] = {"error": f"{type(e).__name__}: {e}"}
+            failed.append(name)
+            traceback.print_exc()
+
+    stamp = datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    write_result(result, args.output or os.path.join(RESULTS_DIR, f"{stamp}.json"))
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(json.dumps({"compare": compare(json.load(f), result)}, indent=2))
+
+    # The other suites' numbers are still saved, but a broken path must not pass as a run
+    if failed:
+        print(f"Benchmarks failed: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Shared helpers for the benchmarks: a throwaway database, synthetic OpenCV media,
+latency statistics and the JSON result format.
+
+Importing this module points DB_PATH at a temporary database, so it must be imported
+before db_connection / db_services.
+"""
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+TMP_DIR = tempfile.mkdtemp(prefix="yoga_bench_")
+os.environ['DB_PATH'] = os.path.join(TMP_DIR, 'bench.db')
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+# ========== Synthetic Media ==========
+
+def draw_figure(width=640, height=480, t=0.0):
+    """
+    A BGR frame with a stick figure whose arms swing with `t` (seconds). Drawn with
+    OpenCV, so benchmarks need no downloaded footage.
+    """
+    frame = np.full((height, width, 3), (210, 225, 235), dtype=np.uint8)
+    cx, top = width // 2, height // 6
+    unit = height / 12.0
+    head_r = int(unit)
+    neck = (cx, int(top + 2 * head_r))
+    hip = (cx, int(top + 6 * unit))
+    swing = np.sin(t * 2 * np.pi * 0.5) * unit * 1.5
+
+    cv2.circle(frame, (cx, top + head_r), head_r, (60, 80, 120), -1)
+    cv2.line(frame, neck, hip, (60, 80, 120), max(2, int(unit / 2)))
+    for side in (-1, 1):
+        hand = (int(cx + side * 3 * unit), int(neck[1] + unit - side * swing))
+        foot = (int(cx + side * 1.5 * unit), int(hip[1] + 4 * unit))
+        cv2.line(frame, (neck[0], neck[1] + int(unit / 2)), hand, (60, 80, 120), max(2, int(unit / 3)))
+        cv2.line(frame, hip, foot, (60, 80, 120), max(2, int(unit / 3)))
+    return frame
+
+
+def write_video(path, seconds=5.0, fps=30.0, size=(640, 480)):
+    """Write a synthetic mp4 of the moving figure. Returns (path, frame count)."""
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    if not writer.isOpened():
+        raise RuntimeError("OpenCV could not open a video writer for mp4v")
+    frames = int(seconds * fps)
+    try:
+        for i in range(frames):
+            writer.write(draw_figure(width, height, i / fps))
+    finally:
+        writer.release()
+    return path, frames
+
+
+def encode_jpeg(frame, quality=80):
+    ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("JPEG encode failed")
+    return buffer.tobytes()
+
+
+def synthetic_keypoints(seed=0):
+    """A plausible 99-value landmark vector (33 x [x, y, visibility]) for classifier-only paths."""
+    rng = np.random.default_rng(seed)
+    points = np.empty((33, 3), dtype=np.float32)
+    points[:, 0] = rng.uniform(0.3, 0.7, 33)
+    points[:, 1] = np.linspace(0.1, 0.9, 33)
+    points[:, 2] = rng.uniform(0.8, 1.0, 33)
+    return points.ravel()
+
+
+# ========== Measurement ==========
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def latency_summary(samples):
+    """Milliseconds p50 / p90 / p99 / mean / max for a list of durations in seconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"samples": 0}
+
+    def ms(seconds):
+        return round(seconds * 1000, 3)
+
+    return {
+        "samples": len(ordered),
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p90_ms": ms(percentile(ordered, 90)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "mean_ms": ms(sum(ordered) / len(ordered)),
+        "max_ms": ms(ordered[-1]),
+    }
+
+
+def time_calls(call, iterations, warmup=3):
+    """Run `call` `warmup` times untimed, then `iterations` times. Returns the durations."""
+    for _ in range(warmup):
+        call()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+# ========== Results ==========
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+            cwd=os.path.dirname(__file__)
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_metadata():
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        "git_commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def write_result(result, output=None):
+    """Print the result as JSON and also write it to `output` (created directories included)."""
+    text = json.dumps(result, indent=2, default=str)
+    print(text)
+    if output:
+        folder = os.path.dirname(output)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(output, 'w') as f:
+            f.write(text)
+    return text
@@ -0,0 +1,149 @@
+"""
+db_services helpers under concurrency: several threads run a mix of library reads,
+ownership lookups, uploads and prediction writes against a seeded throwaway database.
+
+    python -m benchmarks.db_concurrency --seconds 3 --threads 8 --output result.json
+"""
+import argparse
+import random
+import sqlite3
+import threading
+import time
+
+from benchmarks import common  # noqa: F401  (sets DB_PATH before any db import)
+from benchmarks.common import latency_summary, run_metadata, write_result
+
+import db_connection  # noqa: E402
+import db_services  # noqa: E402
+
+USERS = 20
+VIDEOS_PER_USER = 50
+
+# (operation, relative weight); reads dominate as they do in the app
+MIX = (
+    ("get_videos_page", 40),
+    ("get_video_counts", 20),
+    ("get_video_for_user", 20),
+    ("save_video_info", 10),
+    ("store_prediction", 10),
+)
+
+
+def _seed():
+    db_services.ensure_tables()
+    conn = db_connection.get_db_connection()
+    conn.executemany(
+        'INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
+        [(f"user{u}", f"user{u}@example.com", "x") for u in range(USERS)]
+    )
+    conn.executemany(
+        'INSERT INTO videos (fileName, url, user_id) VALUES (?, ?, ?)',
+        [(f"v{u}_{i}.mp4", f"static/videos/v{u}_{i}.mp4", u + 1)
+         for u in range(USERS) for i in range(VIDEOS_PER_USER)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def _prediction_fields():
+    return dict(pose_name="Tadasana", score=80.0, confidence=80.0, is_correct=True,
+                verdict="ok", feedback=["Keep your spine straight"])
+
+
+def _operations(rng):
+    def user():
+        return rng.randint(1, USERS)
+
+    def video():
+        return rng.randint(1, USERS * VIDEOS_PER_USER)
+
+    def store_prediction():
+        db_services.upsert_prediction(video_id=video(), **_prediction_fields())
+
+    return {
+        "get_videos_page": lambda: db_services.get_videos_page(user()),
+        "get_video_counts": lambda: db_services.get_video_counts(user()),
+        "get_video_for_user": lambda: db_services.get_video_for_user(video(), user()),
+        "save_video_info": lambda: db_services.save_video_info("bench.mp4", "static/videos/bench.mp4", user()),
+        "store_prediction": store_prediction,
+    }
+
+
+def prediction_burst(rows=200):
+    """Seconds to store `rows` analysis results one commit each, against one batched transaction."""
+    video_ids = range(1, rows + 1)
+    started = time.perf_counter()
+    for video_id in video_ids:
+        db_services.upsert_prediction(video_id=video_id, model_version="burst-single", **_prediction_fields())
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    db_services.upsert_predictions([dict(video_id=video_id, model_version="burst-batch", **_prediction_fields())
+                                    for video_id in video_ids])
+    batched = time.perf_counter() - started
+    return {"rows": rows, "one_by_one_ms": round(single * 1000, 3), "batched_ms": round(batched * 1000, 3)}
+
+
+def run(seconds=3.0, threads=8):
+    _seed()
+    names = [name for name, _ in MIX]
+    weights = [weight for _, weight in MIX]
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(seed):
+        rng = random.Random(seed)
+        operations = _operations(rng)
+        local = {name: [] for name in names}
+        failed = {name: 0 for name in names}
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                operations[name]()
+            except sqlite3.OperationalError:  # e.g. "database is locked"
+                failed[name] += 1
+                continue
+            local[name].append(time.perf_counter() - started)
+        with lock:
+            for name in names:
+                samples[name].extend(local[name])
+                errors[name] += failed[name]
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(s) for s in samples.values())
+    return {
+        "threads": threads,
+        "seconds": round(elapsed, 3),
+        "operations": total,
+        "operations_per_second": round(total / elapsed, 1),
+        "errors": errors,
+        "latency": {name: latency_summary(samples[name]) for name in names},
+        "prediction_burst": prediction_burst(),
+        "pool": db_connection.connection_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--output', help="write the JSON result here as well")
+    args = parser.parse_args()
+
+    result = {"benchmark": "db_concurrency", "meta": run_metadata()}
+    result.update(run(seconds=args.seconds, threads=args.threads))
+    write_result(result, args.output)
+
+
+if __name__ == '__main__':
+    main()
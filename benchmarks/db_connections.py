@@ -0,0 +1,94 @@
+"""
+Connections per second: the old open-per-call pattern against the pooled WAL layer.
+
+    python -m benchmarks.db_connections --seconds 3 --threads 4 --output result.json
+
+Runs against a throwaway database, never my_database.db.
+"""
+import argparse
+import sqlite3
+import threading
+import time
+
+from benchmarks import common  # noqa: F401  (sets DB_PATH before any db import)
+from benchmarks.common import run_metadata, write_result
+
+import db_connection  # noqa: E402  (must see DB_PATH first)
+import db_services  # noqa: E402
+
+LOOKUP_SQL = 'SELECT * FROM videos WHERE user_id = ?'
+
+
+def _seed(videos=200):
+    db_services.create_tables()
+    conn = db_connection.get_db_connection()
+    conn.execute("INSERT INTO users (name, email, password) VALUES ('bench', 'bench@example.com', 'x')")
+    conn.executemany(
+        'INSERT INTO videos (fileName, url, user_id) VALUES (?, ?, 1)',
+        [(f"v{i}.mp4", f"static/videos/v{i}.mp4") for i in range(videos)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def _unpooled_call():
+    # What every db_services helper used to do
+    conn = sqlite3.connect(db_connection.get_db_path())
+    conn.row_factory = sqlite3.Row
+    conn.execute(LOOKUP_SQL, (1,)).fetchall()
+    conn.close()
+
+
+def _pooled_call():
+    conn = db_connection.get_db_connection()
+    conn.execute(LOOKUP_SQL, (1,)).fetchall()
+    conn.close()
+
+
+def _run(call, seconds, threads):
+    counts = [0] * threads
+    deadline = time.perf_counter() + seconds
+
+    def worker(index):
+        while time.perf_counter() < deadline:
+            call()
+            counts[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return {"calls": sum(counts), "seconds": round(elapsed, 3), "per_second": round(sum(counts) / elapsed, 1)}
+
+
+def run(seconds=3.0, threads=4):
+    _seed()
+    result = {
+        "threads": threads,
+        "before_open_per_call": _run(_unpooled_call, seconds, threads),
+        "after_pooled_wal": _run(_pooled_call, seconds, threads),
+        "pool": db_connection.connection_stats(),
+    }
+    result["speedup"] = round(
+        result["after_pooled_wal"]["per_second"] / max(result["before_open_per_call"]["per_second"], 1e-9), 2
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--output', help="write the JSON result here as well")
+    args = parser.parse_args()
+
+    result = {"benchmark": "db_connections", "meta": run_metadata()}
+    result.update(run(seconds=args.seconds, threads=args.threads))
+    write_result(result, args.output)
+
+
+if __name__ == '__main__':
+    main()
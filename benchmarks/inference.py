@@ -0,0 +1,82 @@
+"""
+Inference paths on synthetic media: process_video / process_video_batched throughput in
+frames per second, and process_live_frame / process_live_landmarks latency.
+
+    python -m benchmarks.inference --seconds 5 --live-iterations 200 --output result.json
+
+MediaPipe may not find a pose in the drawn figure; the frame paths then measure decode
+and pose estimation only, which are the bulk of their cost. process_live_landmarks is
+fed synthetic keypoints so the classifier is always exercised.
+"""
+import argparse
+import os
+import time
+
+from benchmarks import common  # noqa: F401  (sets DB_PATH before any db import)
+from benchmarks.common import (
+    TMP_DIR, draw_figure, write_video, synthetic_keypoints, latency_summary, time_calls,
+    run_metadata, write_result
+)
+
+
+def bench_video(seconds=5.0, fps=30.0, size=(640, 480)):
+    """Frames per second for the per-frame and the batched video pipelines."""
+    from services import yoga_model
+
+    path, frames = write_video(os.path.join(TMP_DIR, 'synthetic.mp4'), seconds, fps, size)
+    results = {"video": {"seconds": seconds, "fps": fps, "size": list(size), "frames": frames}}
+
+    for name, analyze in (("process_video", yoga_model.process_video),
+                          ("process_video_batched", yoga_model.process_video_batched)):
+        started = time.perf_counter()
+        outcome = analyze(path)
+        elapsed = time.perf_counter() - started
+        results[name] = {
+            "seconds": round(elapsed, 3),
+            "frames_per_second": round(frames / elapsed, 1),
+            "label": str(outcome.get("label")),
+        }
+        if "frames_processed" in outcome:
+            results[name]["frames_processed"] = outcome["frames_processed"]
+    return results
+
+
+def bench_live(iterations=200, size=(640, 480)):
+    """Latency of one live camera frame and of one client-side keypoint vector."""
+    from services import yoga_model
+
+    frames = [draw_figure(size[0], size[1], i / 30.0) for i in range(30)]
+    index = [0]
+
+    def live_frame():
+        frame = frames[index[0] % len(frames)]
+        index[0] += 1
+        yoga_model.process_live_frame(frame, session_key="bench")
+
+    keypoints = synthetic_keypoints()
+    return {
+        "process_live_frame": latency_summary(time_calls(live_frame, iterations)),
+        "process_live_landmarks": latency_summary(
+            time_calls(lambda: yoga_model.process_live_landmarks(keypoints), iterations)
+        ),
+    }
+
+
+def run(seconds=5.0, live_iterations=200):
+    return {"video": bench_video(seconds=seconds), "live": bench_live(iterations=live_iterations)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=5.0, help="length of the synthetic video")
+    parser.add_argument('--live-iterations', type=int, default=200)
+    parser.add_argument('--output', help="write the JSON result here as well")
+    args = parser.parse_args()
+
+    result = {"benchmark": "inference", "meta": run_metadata()}
+    result.update(run(seconds=args.seconds, live_iterations=args.live_iterations))
+    write_result(result, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Landmark extraction micro-benchmark: the old list-of-lists + np.array().flatten()
+against extract_landmarks streaming into one float32 array, per frame and into a
+preallocated batch buffer, plus building the classifier input from a batch.
+
+    python -m benchmarks.landmarks --iterations 20000 --output result.json
+
+Uses MediaPipe's landmark protobuf when mediapipe is installed (what the Pose graph
+really returns), otherwise plain Python objects with the same attributes.
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from benchmarks import common  # noqa: F401  (sets DB_PATH before any db import)
+from benchmarks.common import run_metadata, write_result
+
+
+def fake_results(seed=0):
+    """An object shaped like Pose.process() output, with 33 landmarks."""
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(0.0, 1.0, (33, 3)).tolist()
+    try:
+        from mediapipe.framework.formats import landmark_pb2
+    except ImportError:
+        points = [SimpleNamespace(x=x, y=y, z=0.0, visibility=v) for x, y, v in values]
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=points)), "namespace"
+
+    landmark_list = landmark_pb2.NormalizedLandmarkList()
+    for x, y, v in values:
+        landmark_list.landmark.add(x=x, y=y, z=0.0, visibility=v)
+    return SimpleNamespace(pose_landmarks=landmark_list), "protobuf"
+
+
+def _legacy_extract(results, mode="live"):
+    # The implementation extract_landmarks replaced
+    if mode == "live":
+        return np.array([[lm.x, lm.y, lm.visibility] for lm in results.pose_landmarks.landmark]).flatten()
+    return np.array([[lm.x, lm.y] for lm in results.pose_landmarks.landmark]).flatten()
+
+
+def _per_call_us(call, iterations):
+    call()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    return round((time.perf_counter() - started) / iterations * 1e6, 3)
+
+
+def run(iterations=20000, batch_frames=900):
+    from services.yoga_model import extract_landmarks, video_features, live_features, LANDMARK_SHAPE
+
+    results, source = fake_results()
+    row = np.empty(99, dtype=np.float32)
+    batch = np.empty((batch_frames,) + LANDMARK_SHAPE, dtype=np.float32)
+
+    def fill_batch():
+        for i in range(batch_frames):
+            extract_landmarks(results, mode="live", out=batch[i].reshape(-1))
+
+    legacy_rows = [_legacy_extract(results, mode="video") for _ in range(batch_frames)]
+    batch_iterations = max(1, iterations // batch_frames)
+
+    out = {
+        "landmark_source": source,
+        "per_frame_us": {
+            "legacy_live": _per_call_us(lambda: _legacy_extract(results, "live"), iterations),
+            "legacy_video": _per_call_us(lambda: _legacy_extract(results, "video"), iterations),
+            "extract_live": _per_call_us(lambda: extract_landmarks(results, "live"), iterations),
+            "extract_video": _per_call_us(lambda: extract_landmarks(results, "video"), iterations),
+            "extract_live_into_buffer": _per_call_us(lambda: extract_landmarks(results, "live", out=row), iterations),
+        },
+        "batch": {
+            "frames": batch_frames,
+            "fill_buffer_ms": round(_per_call_us(fill_batch, batch_iterations) / 1000, 3),
+            # Classifier input from the batch: old path stacked per-frame rows, then sklearn
+            # converted to float64 for libsvm
+            "legacy_svm_input_us": _per_call_us(
+                lambda: np.asarray(np.array(legacy_rows), dtype=np.float64), batch_iterations
+            ),
+            "svm_input_us": _per_call_us(lambda: video_features(batch), batch_iterations),
+            "rf_input_us": _per_call_us(lambda: live_features(batch), batch_iterations),
+            "rf_input_shares_buffer": bool(np.shares_memory(live_features(batch), batch)),
+        },
+    }
+    per_frame = out["per_frame_us"]
+    out["speedup_live"] = round(per_frame["legacy_live"] / per_frame["extract_live_into_buffer"], 2)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--output', help="write the JSON result here as well")
+    args = parser.parse_args()
+
+    result = {"benchmark": "landmarks", "meta": run_metadata()}
+    result.update(run(iterations=args.iterations))
+    write_result(result, args.output)
+
+
+if __name__ == '__main__':
+    main()
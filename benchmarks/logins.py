@@ -0,0 +1,118 @@
+"""
+Sign-in throughput at the configured KDF cost: the single-hash cost, then logins per
+second (and per core) with several clients calling services.credentials.authenticate
+at once through the bounded hashing pool. Also times the first login of a legacy
+SHA-256 account, which verifies and rehashes.
+
+    python -m benchmarks.logins --seconds 3 --clients 16 --output result.json
+
+Cost parameters come from the same environment variables the app reads (SCRYPT_N,
+SCRYPT_R, SCRYPT_P, PASSWORD_KDF, PBKDF2_ITERATIONS, AUTH_WORKERS), so candidate
+settings can be compared by running this with each of them.
+"""
+import argparse
+import hashlib
+import threading
+import time
+
+from benchmarks import common  # noqa: F401  (sets DB_PATH before any db import)
+from benchmarks.common import latency_summary, time_calls, run_metadata, write_result
+
+import db_connection  # noqa: E402
+import db_services  # noqa: E402
+from services import credentials  # noqa: E402
+
+USERS = 50
+PASSWORD = "correct horse battery staple"
+
+
+def _seed():
+    db_services.ensure_tables()
+    password_hash = credentials.hash_password(PASSWORD)
+    conn = db_connection.get_db_connection()
+    conn.executemany(
+        'INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
+        [(f"user{u}", f"user{u}@example.com", password_hash) for u in range(USERS)]
+    )
+    conn.executemany(
+        'INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
+        [(f"legacy{u}", f"legacy{u}@example.com", hashlib.sha256(PASSWORD.encode()).hexdigest())
+         for u in range(USERS)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def run(seconds=3.0, clients=16, hash_iterations=10):
+    _seed()
+    pool = credentials.get_credential_pool()
+
+    samples, rejected = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(index):
+        local, busy = [], 0
+        i = index
+        while time.perf_counter() < deadline:
+            email = f"user{i % USERS}@example.com"
+            i += clients
+            started = time.perf_counter()
+            try:
+                if credentials.authenticate(email, PASSWORD) is None:
+                    raise RuntimeError("seeded login failed")
+            except credentials.CredentialsBusy:
+                busy += 1
+                continue
+            local.append(time.perf_counter() - started)
+        with lock:
+            samples.extend(local)
+            rejected[0] += busy
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    legacy = iter(range(USERS))
+    legacy_first_login = time_calls(
+        lambda: credentials.authenticate(f"legacy{next(legacy)}@example.com", PASSWORD), USERS, warmup=0
+    )
+    migrated = db_services.get_user_credentials("legacy0@example.com")["password"]
+
+    logins_per_second = len(samples) / elapsed
+    return {
+        "kdf": credentials.PASSWORD_KDF,
+        "params": ({"iterations": credentials.PBKDF2_ITERATIONS} if credentials.PASSWORD_KDF == 'pbkdf2'
+                   else {"n": credentials.SCRYPT_N, "r": credentials.SCRYPT_R, "p": credentials.SCRYPT_P}),
+        "hash": latency_summary(time_calls(lambda: credentials.hash_password(PASSWORD), hash_iterations)),
+        "clients": clients,
+        "pool_workers": pool.max_workers,
+        "seconds": round(elapsed, 3),
+        "logins": len(samples),
+        "rejected_busy": rejected[0],
+        "logins_per_second": round(logins_per_second, 1),
+        "logins_per_second_per_core": round(logins_per_second / pool.max_workers, 1),
+        "login_latency": latency_summary(samples),
+        "legacy_first_login": latency_summary(legacy_first_login),
+        "legacy_migrated": not credentials.verify_password(PASSWORD, migrated)[1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--output', help="write the JSON result here as well")
+    args = parser.parse_args()
+
+    result = {"benchmark": "logins", "meta": run_metadata()}
+    result.update(run(seconds=args.seconds, clients=args.clients))
+    write_result(result, args.output)
+
+
+if __name__ == '__main__':
+    main()
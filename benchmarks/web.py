@@ -0,0 +1,55 @@
+"""
+End-to-end live endpoints through the Flask test client: the legacy base64 JSON
+/predict_live_frame and the binary /predict_live (JPEG body and keypoints body).
+
+    python -m benchmarks.web --iterations 200 --output result.json
+"""
+import argparse
+import base64
+
+from benchmarks import common  # noqa: F401  (sets DB_PATH before any db import)
+from benchmarks.common import (
+    draw_figure, encode_jpeg, synthetic_keypoints, latency_summary, time_calls, run_metadata, write_result
+)
+
+
+def _checked(response):
+    if response.status_code >= 500:
+        raise RuntimeError(f"{response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return response
+
+
+def run(iterations=200, size=(640, 480)):
+    from app import app
+    from services.live_protocol import KEYPOINTS_CONTENT_TYPE
+
+    client = app.test_client()
+    jpeg = encode_jpeg(draw_figure(size[0], size[1]))
+    data_url = "data:image/jpeg;base64," + base64.b64encode(jpeg).decode('ascii')
+    keypoints = synthetic_keypoints().astype('<f4').tobytes()
+
+    calls = {
+        "predict_live_frame_base64": lambda: client.post('/predict_live_frame', json={"frame": data_url}),
+        "predict_live_jpeg": lambda: client.post('/predict_live', data=jpeg, content_type='image/jpeg'),
+        "predict_live_keypoints": lambda: client.post('/predict_live', data=keypoints,
+                                                      content_type=KEYPOINTS_CONTENT_TYPE),
+    }
+    result = {"request_bytes": {"base64_json": len(data_url), "jpeg": len(jpeg), "keypoints": len(keypoints)}}
+    for name, call in calls.items():
+        result[name] = latency_summary(time_calls(lambda: _checked(call()), iterations))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output', help="write the JSON result here as well")
+    args = parser.parse_args()
+
+    result = {"benchmark": "web", "meta": run_metadata()}
+    result.update(run(iterations=args.iterations))
+    write_result(result, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,102 @@
 import sqlite3
 import os
+import threading
+
+from services.instrumentation import span
+
+# Connections are pooled instead of opened per call. close() on a pooled connection rolls
+# back anything uncommitted and hands it back to the pool, so existing callers keep
+# their open/close pattern. The database runs in WAL mode, which lets readers proceed
+# while an analysis job is writing.
+
+DB_FILENAME = 'my_database.db'
+MAX_IDLE_CONNECTIONS = int(os.environ.get('DB_POOL_SIZE', 8))
+BUSY_TIMEOUT_MS = int(os.environ.get('DB_BUSY_TIMEOUT_MS', 5000))
+CACHED_STATEMENTS = 256  # per-connection prepared statement cache
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",   # safe with WAL, avoids an fsync per commit
+    "PRAGMA cache_size=-8000",     # 8 MB page cache
+    "PRAGMA temp_store=MEMORY",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}",
+    "PRAGMA foreign_keys=ON",      # off by default in SQLite; deletes cascade from videos
+)
+
+_db_path = None
+_idle = []
+_pool_lock = threading.Lock()
+_stats = {"opened": 0, "reused": 0, "closed": 0}
+
+
+class PooledConnection(sqlite3.Connection):
+    # True once the caller closed it (whether it went back to the pool or really closed),
+    # so a second close() cannot put the same connection in the pool twice
+    _pooled = False
+
+    def commit(self):
+        # Every helper commits once per write, so this times each DB write
+        with span("db_write"):
+            super().commit()
+
+    def close(self):
+        if self._pooled:
+            return
+        if self.in_transaction:
+            self.rollback()
+        self.row_factory = sqlite3.Row
+        self._pooled = True
+        with _pool_lock:
+            if len(_idle) < MAX_IDLE_CONNECTIONS:
+                _idle.append(self)
+                return
+            _stats["closed"] += 1
+        super().close()
+
+
+def get_db_path():
+    global _db_path
+    if _db_path is None:
+        _db_path = os.path.abspath(os.environ.get('DB_PATH', DB_FILENAME))
+    return _db_path
+
+
+def _open_connection():
+    conn = sqlite3.connect(
+        get_db_path(),
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,  # one thread at a time, but not always the same one
+        cached_statements=CACHED_STATEMENTS,
+        factory=PooledConnection
+    )
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
 
 def get_db_connection():
-    db_path = os.path.abspath('my_database.db')  # This will show exact path
-    print("🔎 DB Path Used:", db_path)
-    conn = sqlite3.connect(db_path)
+    with _pool_lock:
+        conn = _idle.pop() if _idle else None
+        _stats["reused" if conn is not None else "opened"] += 1
+    if conn is None:
+        conn = _open_connection()
+    conn._pooled = False
     conn.row_factory = sqlite3.Row
     return conn
+
+
+def close_all_connections():
+    """Really close every idle connection (e.g. before moving or deleting the database file)."""
+    with _pool_lock:
+        idle = list(_idle)
+        _idle.clear()
+        _stats["closed"] += len(idle)
+    for conn in idle:
+        sqlite3.Connection.close(conn)
+
+
+def connection_stats():
+    with _pool_lock:
+        snapshot = dict(_stats)
+        snapshot["idle"] = len(_idle)
+    return snapshot
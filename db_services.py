@@ -1,6 +1,25 @@
 from db_connection import get_db_connection
-import hashlib
+import json
+import logging
 import sqlite3
+import threading
+
+log = logging.getLogger(__name__)
+
+_tables_ready = False
+_tables_lock = threading.Lock()
+
+
+def ensure_tables():
+    """Run create_tables once per process, on first use rather than at import."""
+    global _tables_ready
+    if _tables_ready:
+        return
+    with _tables_lock:
+        if not _tables_ready:
+            create_tables()
+            _tables_ready = True
+
 
 def create_tables():
     conn = get_db_connection()
@@ -39,27 +58,231 @@ def create_tables():
         );
     ''')
 
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            frames_done INTEGER NOT NULL DEFAULT 0,
+            frames_total INTEGER NOT NULL DEFAULT 0,
+            prediction_id INTEGER,
+            error TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (video_id) REFERENCES videos(id),
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        );
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS analysis_cache (
+            content_hash TEXT NOT NULL,
+            model_fingerprint TEXT NOT NULL,
+            result TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (content_hash, model_fingerprint)
+        );
+    ''')
+
+    _ensure_column(cursor, 'videos', 'content_hash', 'TEXT')
+    _ensure_column(cursor, 'predictions', 'model_version', 'TEXT')
+
+    _apply_migrations(cursor)
+
     conn.commit()
     conn.close()
 
 
-def add_user(name, email, password):
-    print("📥 Trying to insert user:", name, email)
-    hashed_password = hashlib.sha256(password.encode()).hexdigest()
+# Numbered schema migrations, applied in order. The database's PRAGMA user_version holds
+# the last one applied, so each runs exactly once per database. Append new ones; never
+# edit or reorder a migration that has shipped.
+MIGRATIONS = [
+    (1, [
+        'CREATE INDEX IF NOT EXISTS idx_videos_user_id ON videos (user_id, id)',
+        'CREATE INDEX IF NOT EXISTS idx_predictions_video_id ON predictions (video_id, id)',
+        'CREATE INDEX IF NOT EXISTS idx_analysis_jobs_video_status ON analysis_jobs (video_id, status)',
+    ]),
+    (2, [
+        '''CREATE TABLE IF NOT EXISTS chunked_uploads (
+            id TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            total_size INTEGER,
+            received INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'open',
+            video_id INTEGER,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )''',
+    ]),
+    (3, [
+        '''CREATE TABLE IF NOT EXISTS landmark_tracks (
+            video_id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            frames INTEGER NOT NULL,
+            frames_sampled_every INTEGER NOT NULL,
+            sampling TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (video_id) REFERENCES videos(id)
+        )''',
+    ]),
+    (4, [
+        '''CREATE TABLE IF NOT EXISTS prediction_segments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            prediction_id INTEGER NOT NULL,
+            label TEXT NOT NULL,
+            start_time REAL NOT NULL,
+            end_time REAL NOT NULL,
+            frames INTEGER NOT NULL,
+            confidence REAL,
+            FOREIGN KEY (prediction_id) REFERENCES predictions(id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_prediction_segments_prediction ON prediction_segments (prediction_id, start_time)',
+    ]),
+    # One prediction per (video, model version), and rows that belong to a video go with
+    # it. SQLite cannot add either constraint in place, so the tables are rebuilt; older
+    # duplicates (all but the newest row) and rows of already deleted videos are dropped.
+    (5, [
+        '''CREATE TABLE predictions_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_id INTEGER NOT NULL,
+            pose_name TEXT NOT NULL,
+            score REAL,
+            confidence REAL,
+            is_correct INTEGER,
+            verdict TEXT,
+            feedback TEXT,
+            model_version TEXT NOT NULL DEFAULT '',
+            UNIQUE (video_id, model_version),
+            FOREIGN KEY (video_id) REFERENCES videos(id) ON DELETE CASCADE
+        )''',
+        '''INSERT INTO predictions_new
+            (id, video_id, pose_name, score, confidence, is_correct, verdict, feedback, model_version)
+        SELECT id, video_id, pose_name, score, confidence, is_correct, verdict, feedback, COALESCE(model_version, '')
+        FROM predictions
+        WHERE id IN (
+            SELECT MAX(id) FROM predictions
+            WHERE video_id IN (SELECT id FROM videos)
+            GROUP BY video_id, COALESCE(model_version, '')
+        )''',
+        'DROP TABLE predictions',
+        'ALTER TABLE predictions_new RENAME TO predictions',
+        'CREATE INDEX idx_predictions_video_id ON predictions (video_id, id)',
+
+        '''CREATE TABLE prediction_segments_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            prediction_id INTEGER NOT NULL,
+            label TEXT NOT NULL,
+            start_time REAL NOT NULL,
+            end_time REAL NOT NULL,
+            frames INTEGER NOT NULL,
+            confidence REAL,
+            FOREIGN KEY (prediction_id) REFERENCES predictions(id) ON DELETE CASCADE
+        )''',
+        '''INSERT INTO prediction_segments_new
+        SELECT * FROM prediction_segments WHERE prediction_id IN (SELECT id FROM predictions)''',
+        'DROP TABLE prediction_segments',
+        'ALTER TABLE prediction_segments_new RENAME TO prediction_segments',
+        'CREATE INDEX idx_prediction_segments_prediction ON prediction_segments (prediction_id, start_time)',
+
+        '''CREATE TABLE landmark_tracks_new (
+            video_id INTEGER PRIMARY KEY,
+            path TEXT NOT NULL,
+            frames INTEGER NOT NULL,
+            frames_sampled_every INTEGER NOT NULL,
+            sampling TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (video_id) REFERENCES videos(id) ON DELETE CASCADE
+        )''',
+        '''INSERT INTO landmark_tracks_new
+        SELECT * FROM landmark_tracks WHERE video_id IN (SELECT id FROM videos)''',
+        'DROP TABLE landmark_tracks',
+        'ALTER TABLE landmark_tracks_new RENAME TO landmark_tracks',
+
+        '''CREATE TABLE analysis_jobs_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            video_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            frames_done INTEGER NOT NULL DEFAULT 0,
+            frames_total INTEGER NOT NULL DEFAULT 0,
+            prediction_id INTEGER,
+            error TEXT,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            updated_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (video_id) REFERENCES videos(id) ON DELETE CASCADE,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )''',
+        '''INSERT INTO analysis_jobs_new
+        SELECT * FROM analysis_jobs WHERE video_id IN (SELECT id FROM videos)''',
+        'DROP TABLE analysis_jobs',
+        'ALTER TABLE analysis_jobs_new RENAME TO analysis_jobs',
+        'CREATE INDEX idx_analysis_jobs_video_status ON analysis_jobs (video_id, status)',
+    ]),
+    # Stored video bytes, one row per distinct content hash, counting the videos rows
+    # that point at them (see services.video_storage)
+    (6, [
+        '''CREATE TABLE IF NOT EXISTS video_blobs (
+            content_hash TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 1,
+            created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )''',
+    ]),
+    # The process running a queued/running job; it renews updated_at as a lease
+    (7, [
+        'ALTER TABLE analysis_jobs ADD COLUMN owner TEXT',
+    ]),
+]
+
+
+def _apply_migrations(cursor):
+    cursor.execute('PRAGMA user_version')
+    current = cursor.fetchone()[0]
+    pending = [(version, statements) for version, statements in MIGRATIONS if version > current]
+    if not pending:
+        return
+
+    # Table rebuilds must not fire foreign key actions, and that pragma is ignored inside
+    # a transaction, so switch it off first; then apply everything pending atomically
+    conn = cursor.connection
+    conn.commit()
+    cursor.execute('PRAGMA foreign_keys = OFF')
+    try:
+        cursor.execute('BEGIN')
+        for version, statements in pending:
+            for statement in statements:
+                cursor.execute(statement)
+            # PRAGMA does not take bound parameters; version is our own integer
+            cursor.execute(f'PRAGMA user_version = {int(version)}')
+        conn.commit()
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        cursor.execute('PRAGMA foreign_keys = ON')
+
+
+def _ensure_column(cursor, table, column, ddl):
+    """Add a column to an existing table if an older database does not have it yet."""
+    cursor.execute(f'PRAGMA table_info({table})')
+    if column not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}')
+
+
+def add_user(name, email, password_hash):
+    """Insert a user with an already hashed password (see services.credentials)."""
     conn = get_db_connection()
     cursor = conn.cursor()
     try:
         cursor.execute(
             'INSERT INTO users (name, email, password) VALUES (?, ?, ?)',
-            (name, email, hashed_password)
+            (name, email, password_hash)
         )
         conn.commit()
-        print("✅ User inserted.")
-
-        # Debug: Show all users
-        cursor.execute("SELECT * FROM users")
-        for row in cursor.fetchall():
-            print("📄 User in DB:", dict(row))
+        log.info("User %s registered", cursor.lastrowid)
 
     except sqlite3.IntegrityError:
         raise ValueError("Email already registered.")
@@ -67,32 +290,99 @@ def add_user(name, email, password):
         conn.close()
 
 
-def validate_user(email, password):
-    hashed_password = hashlib.sha256(password.encode()).hexdigest()
+def get_user_credentials(email):
+    """Return {"id", "name", "password"} for the email (password is the stored hash), or None."""
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT id, name FROM users WHERE email=? AND password=?", (email, hashed_password))
-    user = cursor.fetchone()
+    cursor.execute("SELECT id, name, password FROM users WHERE email = ?", (email,))
+    row = cursor.fetchone()
     conn.close()
-    return user  # Returns tuple (id, name) or None
+    return dict(row) if row else None
 
 
-def save_video_info(filename, url, user_id):
+def update_user_password(user_id, password_hash):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET password = ? WHERE id = ?", (password_hash, user_id))
+    conn.commit()
+    conn.close()
+
+
+def save_video_info(filename, url, user_id, content_hash=None):
+    """Insert a video row. Returns the new video id."""
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute('''
-        INSERT INTO videos (fileName, url, user_id)
-        VALUES (?, ?, ?)
-    ''', (filename, url, user_id))
+        INSERT INTO videos (fileName, url, user_id, content_hash)
+        VALUES (?, ?, ?, ?)
+    ''', (filename, url, user_id, content_hash))
     conn.commit()
+    video_id = cursor.lastrowid
     conn.close()
+    return video_id
 
 
-def get_all_videos(user_id):
+def save_video_ref(filename, url, user_id, content_hash, size):
+    """
+    Insert a videos row for stored bytes and count it as a reference to them, in one
+    transaction. `url` is recorded only when the bytes are not stored yet; otherwise the
+    row points at the existing file. Returns (video id, url of the stored bytes).
+    """
     conn = get_db_connection()
     cursor = conn.cursor()
+    try:
+        # Write lock up front, so a concurrent delete_video_by_id either finished
+        # (row and file gone) or waits until this reference is counted
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('''
+            INSERT INTO video_blobs (content_hash, url, size) VALUES (?, ?, ?)
+            ON CONFLICT (content_hash) DO UPDATE SET refcount = refcount + 1
+            RETURNING url
+        ''', (content_hash, url, size))
+        url = cursor.fetchone()["url"]
+        cursor.execute('''
+            INSERT INTO videos (fileName, url, user_id, content_hash)
+            VALUES (?, ?, ?, ?)
+        ''', (filename, url, user_id, content_hash))
+        video_id = cursor.lastrowid
+        conn.commit()
+    finally:
+        conn.close()
+    return video_id, url
 
-    cursor.execute('''
+
+def set_video_content_hash(video_id, content_hash):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('UPDATE videos SET content_hash = ? WHERE id = ?', (content_hash, video_id))
+    conn.commit()
+    conn.close()
+
+
+def get_content_hash_by_url(url):
+    """Content hash recorded for the newest video stored at `url`, or None."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT content_hash FROM videos WHERE url = ? ORDER BY id DESC LIMIT 1', (url,))
+    row = cursor.fetchone()
+    conn.close()
+    return row["content_hash"] if row else None
+
+
+VIDEO_PAGE_SIZE = 24
+
+
+def get_videos_page(user_id, limit=VIDEO_PAGE_SIZE, after_id=None, before_id=None):
+    """
+    One page of a user's videos in id order, using the id as a keyset cursor (no OFFSET,
+    so deep pages cost the same as the first). Pass `after_id` for the next page or
+    `before_id` for the previous one. Returns {"videos", "next_after", "prev_before"};
+    the cursors are None when there is no page in that direction.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    select = '''
         SELECT v.*, (
             SELECT p.id FROM predictions p
             WHERE p.video_id = v.id
@@ -100,44 +390,179 @@ def get_all_videos(user_id):
             LIMIT 1
         ) AS prediction_id
         FROM videos v
-        WHERE v.user_id = ?
-    ''', (user_id,))
-
-    rows = cursor.fetchall()
-    columns = [desc[0] for desc in cursor.description]
-    videos = [dict(zip(columns, row)) for row in rows]
+    '''
+    if before_id is not None:
+        cursor.execute(select + 'WHERE v.user_id = ? AND v.id < ? ORDER BY v.id DESC LIMIT ?',
+                       (user_id, before_id, limit + 1))
+        rows = cursor.fetchall()
+        more_before = len(rows) > limit
+        videos = [dict(row) for row in reversed(rows[:limit])]
+        more_after = True
+    else:
+        cursor.execute(select + 'WHERE v.user_id = ? AND v.id > ? ORDER BY v.id ASC LIMIT ?',
+                       (user_id, after_id or 0, limit + 1))
+        rows = cursor.fetchall()
+        more_after = len(rows) > limit
+        videos = [dict(row) for row in rows[:limit]]
+        more_before = after_id is not None and bool(videos)
+        if more_before:
+            cursor.execute('SELECT EXISTS (SELECT 1 FROM videos WHERE user_id = ? AND id < ?)',
+                           (user_id, videos[0]['id']))
+            more_before = bool(cursor.fetchone()[0])
 
     conn.close()
-    return videos
+    return {
+        "videos": videos,
+        "next_after": videos[-1]['id'] if videos and more_after else None,
+        "prev_before": videos[0]['id'] if videos and more_before else None,
+    }
 
 
-def delete_video_by_id(video_id):
-    """Delete video by ID. Returns True if deleted, False if not."""
+def get_video_counts(user_id):
+    """Total and analyzed video counts for a user, computed in SQL."""
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('DELETE FROM videos WHERE id = ?', (video_id,))
-    conn.commit()
-    rows_deleted = cursor.rowcount
+    cursor.execute('''
+        SELECT COUNT(*) AS total,
+               COALESCE(SUM(EXISTS (SELECT 1 FROM predictions p WHERE p.video_id = v.id)), 0) AS analyzed
+        FROM videos v
+        WHERE v.user_id = ?
+    ''', (user_id,))
+    row = cursor.fetchone()
     conn.close()
-    return rows_deleted > 0
+    return {"total": row['total'], "analyzed": row['analyzed']}
 
 
-def save_prediction(video_id, pose_name, score, confidence, is_correct, verdict, feedback):
+def get_video_for_user(video_id, user_id):
+    """One video owned by `user_id`, with its latest prediction id, or None."""
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute('''
-        INSERT INTO predictions (video_id, pose_name, score, confidence, is_correct, verdict, feedback)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (video_id, pose_name, score, confidence, int(is_correct), verdict, feedback))
-    conn.commit()
+        SELECT v.*, (
+            SELECT p.id FROM predictions p
+            WHERE p.video_id = v.id
+            ORDER BY p.id DESC
+            LIMIT 1
+        ) AS prediction_id
+        FROM videos v
+        WHERE v.id = ? AND v.user_id = ?
+    ''', (video_id, user_id))
+    row = cursor.fetchone()
     conn.close()
+    return dict(row) if row else None
+
+
+def delete_video_by_id(video_id, unlink=None):
+    """
+    Delete video by ID. Its predictions (with their segments), analysis jobs and landmark
+    track row go with it through ON DELETE CASCADE, and it drops its reference to the
+    stored bytes, all in one transaction. Returns None if there was no such video,
+    otherwise {"url", "unreferenced"}: unreferenced is True when no video points at the
+    file any more. `unlink(url)` is then called before the transaction commits, while it
+    holds the write lock, so no upload in any process can count a new reference to the
+    file between the last one going and the file being removed.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('DELETE FROM videos WHERE id = ? RETURNING url, content_hash', (video_id,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        url, content_hash = row["url"], row["content_hash"]
+
+        cursor.execute('UPDATE video_blobs SET refcount = refcount - 1 WHERE content_hash = ? RETURNING refcount',
+                       (content_hash,))
+        blob = cursor.fetchone()
+        if blob is not None:
+            unreferenced = blob["refcount"] <= 0
+            if unreferenced:
+                cursor.execute('DELETE FROM video_blobs WHERE content_hash = ?', (content_hash,))
+        else:
+            # Stored before deduplication: the file is shared only if another row names it
+            cursor.execute('SELECT EXISTS (SELECT 1 FROM videos WHERE url = ?)', (url,))
+            unreferenced = not cursor.fetchone()[0]
+        if unreferenced and unlink is not None:
+            unlink(url)
+        conn.commit()
+    finally:
+        conn.close()
+    return {"url": url, "unreferenced": unreferenced}
+
+
+_UPSERT_PREDICTION = '''
+    INSERT INTO predictions (video_id, pose_name, score, confidence, is_correct, verdict, feedback, model_version)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (video_id, model_version) DO UPDATE SET
+        pose_name = excluded.pose_name, score = excluded.score, confidence = excluded.confidence,
+        is_correct = excluded.is_correct, verdict = excluded.verdict, feedback = excluded.feedback
+    RETURNING id
+'''
+
+
+def _write_prediction(cursor, video_id, pose_name, score, confidence, is_correct, verdict, feedback,
+                      model_version=None, segments=None):
+    cursor.execute(_UPSERT_PREDICTION, (video_id, pose_name, score, confidence, int(is_correct), verdict,
+                                        json.dumps(list(feedback)), model_version or ''))
+    prediction_id = cursor.fetchone()[0]
+    if segments is not None:
+        cursor.execute('DELETE FROM prediction_segments WHERE prediction_id = ?', (prediction_id,))
+        cursor.executemany('''
+            INSERT INTO prediction_segments (prediction_id, label, start_time, end_time, frames, confidence)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (prediction_id, segment["label"], segment["start"], segment["end"], segment["frames"],
+             segment.get("confidence"))
+            for segment in segments
+        ])
+    return prediction_id
+
+
+def upsert_prediction(video_id, pose_name, score, confidence, is_correct, verdict, feedback, model_version=None,
+                      segments=None):
+    """
+    Insert or overwrite the prediction of a video for one model version. `feedback` is a
+    list of strings (stored as JSON). When `segments` is given they replace the
+    prediction's timeline in the same transaction. Returns the prediction id, which stays
+    the same across overwrites.
+    """
+    return upsert_predictions([dict(
+        video_id=video_id, pose_name=pose_name, score=score, confidence=confidence, is_correct=is_correct,
+        verdict=verdict, feedback=feedback, model_version=model_version, segments=segments
+    )])[0]
+
+
+def upsert_predictions(rows):
+    """upsert_prediction for many rows (dicts of its arguments) in one transaction. Returns their ids in order."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        ids = [_write_prediction(cursor, **row) for row in rows]
+        conn.commit()
+    finally:
+        conn.close()
+    return ids
+
+
+def _decode_feedback(stored):
+    """Feedback is stored as a JSON list; rows written before that hold a delimited string."""
+    if not stored:
+        return []
+    if stored.startswith('['):
+        return json.loads(stored)
+    if '\n' in stored:
+        return stored.split('\n')
+    if ',' in stored:
+        return [item.strip() for item in stored.split(',')]
+    return [stored]
 
 
 def get_prediction_by_id(prediction_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute('''
-        SELECT p.*, v.url as video_url, v.fileName
+        SELECT p.*, v.url as video_url, v.fileName, v.user_id
         FROM predictions p
         JOIN videos v ON p.video_id = v.id
         WHERE p.id = ?
@@ -147,14 +572,7 @@ def get_prediction_by_id(prediction_id):
     if row:
         columns = [desc[0] for desc in cursor.description]
         data = dict(zip(columns, row))
-        if data.get('feedback'):
-            # Adjust split method depending on how it's stored
-            if '\n' in data['feedback']:
-                data['feedback'] = data['feedback'].split('\n')
-            elif ',' in data['feedback']:
-                data['feedback'] = [item.strip() for item in data['feedback'].split(',')]
-            else:
-                data['feedback'] = [data['feedback']]
+        data['feedback'] = _decode_feedback(data.get('feedback'))
         conn.close()
         return data
 
@@ -162,48 +580,222 @@ def get_prediction_by_id(prediction_id):
     return None
 
 
-def get_prediction_by_video_id(video_id):
+def get_video_by_id(video_id):
+    """Retrieve video by ID from the videos table. Returns a dictionary if found, None otherwise."""
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM predictions WHERE video_id = ?', (video_id,))
+    cursor.execute('SELECT * FROM videos WHERE id = ?', (video_id,))
     row = cursor.fetchone()
     conn.close()
+    return dict(row) if row else None
 
-    if row:
-        columns = [desc[0] for desc in cursor.description]
-        return dict(zip(columns, row))
-    return None
+def get_prediction_segments(prediction_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT label, start_time, end_time, frames, confidence
+        FROM prediction_segments
+        WHERE prediction_id = ?
+        ORDER BY start_time
+    ''', (prediction_id,))
+    rows = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return rows
 
 
-def delete_prediction_by_id(prediction_id):
-    """Delete prediction by ID. Returns True if deleted, False otherwise."""
+# ========== Analysis Jobs ==========
+
+def create_analysis_job(video_id, user_id, owner=None):
+    """Insert a queued analysis job, leased by `owner` when given. Returns the job id."""
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('DELETE FROM predictions WHERE id = ?', (prediction_id,))
+    cursor.execute(
+        'INSERT INTO analysis_jobs (video_id, user_id, owner) VALUES (?, ?, ?)',
+        (video_id, user_id, owner)
+    )
     conn.commit()
-    rows_deleted = cursor.rowcount
+    job_id = cursor.lastrowid
     conn.close()
-    return rows_deleted > 0
+    return job_id
 
-def get_video_by_id(video_id):
-    """Retrieve video by ID from the videos table. Returns a dictionary if found, None otherwise."""
+
+def get_analysis_job(job_id):
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('SELECT * FROM videos WHERE id = ?', (video_id,))
+    cursor.execute('SELECT * FROM analysis_jobs WHERE id = ?', (job_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def get_active_job_for_video(video_id):
+    """Return the queued/running job for a video, or None."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT * FROM analysis_jobs
+        WHERE video_id = ? AND status IN ('queued', 'running')
+        ORDER BY id DESC
+        LIMIT 1
+    ''', (video_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
+
+def update_job_status(job_id, status, frames_done=None, frames_total=None, prediction_id=None, error=None):
+    """Update a job's status and, when given, its progress / outcome columns."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE analysis_jobs
+        SET status = ?,
+            frames_done = COALESCE(?, frames_done),
+            frames_total = COALESCE(?, frames_total),
+            prediction_id = COALESCE(?, prediction_id),
+            error = COALESCE(?, error),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', (status, frames_done, frames_total, prediction_id, error, job_id))
+    conn.commit()
+    conn.close()
+
+
+def renew_job_leases(owner):
+    """Touch updated_at on every queued/running job of `owner`, keeping its lease alive."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE analysis_jobs SET updated_at = CURRENT_TIMESTAMP
+        WHERE owner = ? AND status IN ('queued', 'running')
+    ''', (owner,))
+    conn.commit()
+    conn.close()
+
+
+def fail_interrupted_jobs(lease_seconds):
+    """
+    Mark queued/running jobs as failed when nothing renewed them for `lease_seconds`,
+    i.e. the process that ran them is gone. Jobs of live processes are left alone.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE analysis_jobs
+        SET status = 'failed', error = 'Interrupted by server restart', updated_at = CURRENT_TIMESTAMP
+        WHERE status IN ('queued', 'running') AND updated_at < datetime('now', ?)
+    ''', (f'-{int(lease_seconds)} seconds',))
+    failed = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return failed
+
+
+# ========== Analysis Result Cache ==========
+
+def get_cached_analysis(content_hash, model_fingerprint):
+    """Return the cached result JSON for a video content hash + model fingerprint, or None."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        'SELECT result FROM analysis_cache WHERE content_hash = ? AND model_fingerprint = ?',
+        (content_hash, model_fingerprint)
+    )
+    row = cursor.fetchone()
+    conn.close()
+    return row['result'] if row else None
+
+
+def save_cached_analysis(content_hash, model_fingerprint, result_json):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT OR REPLACE INTO analysis_cache (content_hash, model_fingerprint, result)
+        VALUES (?, ?, ?)
+    ''', (content_hash, model_fingerprint, result_json))
+    conn.commit()
+    conn.close()
+
+
+# ========== Chunked Uploads ==========
+
+def create_chunked_upload(upload_id, user_id, filename, total_size=None):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute(
+        'INSERT INTO chunked_uploads (id, user_id, filename, total_size) VALUES (?, ?, ?, ?)',
+        (upload_id, user_id, filename, total_size)
+    )
+    conn.commit()
+    conn.close()
+
+
+def get_chunked_upload(upload_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM chunked_uploads WHERE id = ?', (upload_id,))
     row = cursor.fetchone()
     conn.close()
     return dict(row) if row else None
 
-def update_prediction(video_id, pose_name, score, confidence, is_correct, verdict, feedback):
+
+def update_chunked_upload(upload_id, received=None, status=None, video_id=None):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        UPDATE chunked_uploads
+        SET received = COALESCE(?, received),
+            status = COALESCE(?, status),
+            video_id = COALESCE(?, video_id),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    ''', (received, status, video_id, upload_id))
+    conn.commit()
+    conn.close()
+
+
+def count_open_uploads(user_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM chunked_uploads WHERE user_id = ? AND status = 'open'", (user_id,))
+    count = cursor.fetchone()[0]
+    conn.close()
+    return count
+
+
+def expire_chunked_uploads(max_age_seconds):
+    """Mark open uploads that received nothing for `max_age_seconds` as expired. Returns their ids."""
     conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute('''
-        UPDATE predictions
-        SET pose_name = ?, score = ?, confidence = ?, is_correct = ?, verdict = ?, feedback = ?
-        WHERE video_id = ?
-    ''', (pose_name, score, confidence, is_correct, verdict, feedback, video_id))
+        UPDATE chunked_uploads SET status = 'expired', updated_at = CURRENT_TIMESTAMP
+        WHERE status = 'open' AND updated_at < datetime('now', ?)
+        RETURNING id
+    ''', (f"-{int(max_age_seconds)} seconds",))
+    expired = [row[0] for row in cursor.fetchall()]
     conn.commit()
-    updated = cursor.rowcount
     conn.close()
-    return updated > 0
+    return expired
+
 
+# ========== Landmark Tracks ==========
+
+def save_landmark_track(video_id, path, frames, frames_sampled_every, sampling):
+    """Point a video at its stored landmark arrays (replacing any earlier track)."""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT OR REPLACE INTO landmark_tracks (video_id, path, frames, frames_sampled_every, sampling)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (video_id, path, frames, frames_sampled_every, sampling))
+    conn.commit()
+    conn.close()
+
+
+def get_landmark_track(video_id):
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM landmark_tracks WHERE video_id = ?', (video_id,))
+    row = cursor.fetchone()
+    conn.close()
+    return dict(row) if row else None
@@ -2,3 +2,5 @@ from .signup_route import signup_bp
 from .login_route import login_bp
 from .logout_route import logout_bp
 from .video_routes import video_bp
+from .live_routes import live_bp
+from .model_routes import model_bp
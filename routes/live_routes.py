@@ -0,0 +1,123 @@
+import json
+
+# The handlers below use `session` for live sessions; the login session goes by another name
+from flask import Blueprint, request, jsonify, session as login_session
+
+from services.live_sessions import get_live_sessions, LiveSessionLimit
+from services.pose_pool import get_pose_pool, PoseEstimatorPoolExhausted
+from services.live_protocol import (
+    KEYPOINTS_CONTENT_TYPE, IMAGE_CONTENT_TYPES, LiveInputError,
+    decode_image_bytes, keypoints_from_bytes, keypoints_from_json
+)
+
+live_bp = Blueprint('live', __name__)
+
+# Streaming live sessions. Each session keeps a pooled Pose tracker and smoothed labels.
+# Preferred transport is the WebSocket at /live/ws (needs flask-sock); the HTTP routes
+# below give the same per-session behaviour for clients that cannot open a socket.
+
+
+def _session_payload(session, result, seq):
+    return {
+        "session_id": session.id,
+        "seq": seq,
+        "dropped": result is None,
+        "feedback": result,
+    }
+
+
+@live_bp.route('/live/sessions', methods=['POST'])
+def open_live_session():
+    try:
+        session = get_live_sessions().open()
+    except LiveSessionLimit as e:
+        response = jsonify({"error": str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    return jsonify({"session_id": session.id}), 201
+
+
+@live_bp.route('/live/sessions/<session_id>/frames', methods=['POST'])
+def live_session_frame(session_id):
+    session = get_live_sessions().get(session_id)
+    if session is None:
+        return jsonify({"error": "Session not found."}), 404
+
+    seq = request.headers.get('X-Frame-Seq', type=int)
+    content_type = request.mimetype
+    try:
+        if content_type == KEYPOINTS_CONTENT_TYPE:
+            result = session.process_landmarks(keypoints_from_bytes(request.get_data()), seq)
+        elif content_type == 'application/json':
+            result = session.process_landmarks(keypoints_from_json(request.get_json() or {}), seq)
+        elif content_type in IMAGE_CONTENT_TYPES:
+            result = session.process_frame(decode_image_bytes(request.get_data()), seq)
+        else:
+            return jsonify({"error": f"Unsupported content type: {content_type}"}), 415
+    except LiveInputError as e:
+        return jsonify({"error": str(e)}), 400
+    except PoseEstimatorPoolExhausted as e:
+        response = jsonify({"error": str(e)})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+
+    return jsonify(_session_payload(session, result, seq))
+
+
+@live_bp.route('/live/sessions/<session_id>', methods=['DELETE'])
+def close_live_session(session_id):
+    get_live_sessions().close(session_id)
+    return '', 204
+
+
+@live_bp.route('/live/pool-stats')
+def pose_pool_stats():
+    if 'user_id' not in login_session:
+        return jsonify({"error": "Not signed in."}), 401
+    return jsonify(get_pose_pool().stats())
+
+
+def _latest_message(ws, message):
+    """Drain whatever else is already queued on the socket and keep only the newest frame."""
+    while True:
+        newer = ws.receive(timeout=0)
+        if newer is None:
+            return message
+        message = newer
+
+
+def live_socket(ws):
+    """
+    WebSocket loop for one camera session. Binary messages are encoded images; text
+    messages are JSON keypoints ({"keypoints": [...], "seq": n}). If the client sends
+    faster than we classify, the backlog is skipped and only the newest frame is used.
+    """
+    try:
+        session = get_live_sessions().open()
+    except LiveSessionLimit as e:
+        ws.send(json.dumps({"error": str(e)}))
+        return
+
+    ws.send(json.dumps({"session_id": session.id}))
+    try:
+        while True:
+            message = ws.receive()
+            if message is None:
+                break
+            message = _latest_message(ws, message)
+
+            seq = None
+            try:
+                if isinstance(message, (bytes, bytearray)):
+                    result = session.process_frame(decode_image_bytes(bytes(message)))
+                else:
+                    payload = json.loads(message)
+                    seq = payload.get("seq")
+                    result = session.process_landmarks(keypoints_from_json(payload), seq)
+            except (LiveInputError, ValueError, PoseEstimatorPoolExhausted) as e:
+                ws.send(json.dumps({"error": str(e)}))
+                continue
+
+            ws.send(json.dumps(_session_payload(session, result, seq)))
+    finally:
+        get_live_sessions().close(session.id)
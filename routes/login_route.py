@@ -1,7 +1,7 @@
 from flask import Blueprint, render_template, request, session, redirect, url_for
 from models import LoginModel
 from pydantic import ValidationError
-from db_services import validate_user
+from services.credentials import authenticate, CredentialsBusy
 
 login_bp = Blueprint('login', __name__)
 
@@ -16,7 +16,10 @@ def signin():
         except ValidationError as e:
             return render_template("signin.html", error=e.errors()[0]['msg'])
 
-        user = validate_user(credentials.email, credentials.password)
+        try:
+            user = authenticate(credentials.email, credentials.password)
+        except CredentialsBusy as e:
+            return render_template('signin.html', error=str(e)), 503
         if user:
             session['user_id'] = user[0]
             session['user'] = user[1] 
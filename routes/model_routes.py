@@ -0,0 +1,74 @@
+import hmac
+import logging
+import os
+
+from flask import Blueprint, current_app, request, session, jsonify
+
+from services.model_registry import describe_models, get_entry
+
+model_bp = Blueprint('models', __name__)
+log = logging.getLogger(__name__)
+
+# Model versions can be listed, reloaded from disk and rolled back without restarting.
+# A reload here only affects this worker process; replacing the model file on disk is
+# picked up by every worker (see MODEL_RELOAD_CHECK_INTERVAL).
+# Reloading and activating change the model for every user, so they need the operator
+# token from MODEL_ADMIN_TOKEN (sent as X-Admin-Token); without one configured they are off.
+
+
+def _admin_error():
+    """An error response unless the request carries the configured admin token."""
+    expected = current_app.config.get('MODEL_ADMIN_TOKEN')
+    if not expected:
+        return jsonify({"error": "Model administration is disabled."}), 403
+    supplied = request.headers.get('X-Admin-Token', '')
+    if not hmac.compare_digest(supplied.encode(), expected.encode()):
+        return jsonify({"error": "Admin token required."}), 403
+    return None
+
+
+@model_bp.route('/models')
+def list_models():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not signed in."}), 401
+    return jsonify(describe_models())
+
+
+@model_bp.route('/models/<name>/reload', methods=['POST'])
+def reload_model(name):
+    error = _admin_error()
+    if error:
+        return error
+
+    try:
+        entry = get_entry(name)
+    except KeyError as e:
+        return jsonify({"error": str(e)}), 404
+
+    # Only model files next to the current one may be loaded (they are unpickled)
+    path = (request.get_json(silent=True) or {}).get("path")
+    if path:
+        model_dir = os.path.dirname(os.path.realpath(entry.path))
+        path = os.path.realpath(os.path.join(model_dir, path))
+        if os.path.dirname(path) != model_dir or not os.path.isfile(path):
+            return jsonify({"error": "Model file not found."}), 400
+
+    try:
+        loaded = entry.reload(path)
+    except Exception as e:
+        log.error("Reload of %s failed: %s", name, e)
+        return jsonify({"error": f"Reload failed: {e}"}), 500
+    return jsonify(loaded.describe())
+
+
+@model_bp.route('/models/<name>/activate/<version>', methods=['POST'])
+def activate_model(name, version):
+    error = _admin_error()
+    if error:
+        return error
+
+    try:
+        active = get_entry(name).activate(version)
+    except KeyError as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify(active.describe())
@@ -1,6 +1,6 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from models import UserModel
-from db_services import add_user
+from services.credentials import register_user, CredentialsBusy
 from pydantic import ValidationError
 
 signup_bp = Blueprint('signup', __name__)
@@ -16,7 +16,7 @@ def signup():
                 confirm_password=request.form['confirm_password']
             )
 
-            add_user(user_data.name, user_data.email, user_data.password)
+            register_user(user_data.name, user_data.email, user_data.password)
             flash("Signup successful! Please login.")
             return redirect(url_for('login.signin'))
 
@@ -25,6 +25,8 @@ def signup():
             return render_template('signup.html', error=error_msg)
         except ValueError as ve:
             return render_template('signup.html', error=str(ve))
+        except CredentialsBusy as e:
+            return render_template('signup.html', error=str(e)), 503
         except Exception as e:
             return render_template('signup.html', error=f"Something went wrong: {str(e)}")
 
@@ -1,25 +1,24 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session, current_app, flash
-from services.yoga_model import process_video  # Your updated prediction function
-from db_services import save_video_info, get_all_videos, delete_video_by_id
+from flask import Blueprint, render_template, request, redirect, url_for, session, current_app, flash, jsonify
+from services.yoga_model import process_video_batched  # Your updated prediction function
+from services.video_pool import analyze_video_parallel
+from services.analysis_jobs import get_job_queue, JobQueueFull, store_analysis_result
+from services.hashing import hash_file
+from services.media import send_media
+from services import result_cache, landmark_store, result_pages, video_storage
+from services.video_proxy import schedule_proxy, analysis_source, remove_proxy, proxy_path_for, PROXY_VERSION
+from services.chunked_upload import start_upload, append_chunk, complete_upload, UploadError, MAX_CHUNK_BYTES
+from db_services import get_chunked_upload
+from db_services import (
+    get_videos_page, get_video_counts, get_video_for_user, get_analysis_job,
+    create_analysis_job, update_job_status, set_video_content_hash, get_video_by_id
+)
 import os
+import logging
 from collections import Counter
-import base64
-import uuid
 from werkzeug.utils import secure_filename
 
 video_bp = Blueprint('video', __name__)
-
-def get_feedback_for_pose(pose):
-    feedback_map = {
-        "Tadasana": ["Bring your feet together", "Keep your spine straight"],
-        "Bhujangasana": ["Lift your chest higher", "Place hands under shoulders"],
-        "Trikonasana": ["Raise your left arm", "Lower your right hand towards your foot"],
-        "Padmasana": ["Keep your back straight"],
-        "Vrikshasana": ["Balance on one leg", "Keep hands together"],
-        "Shavasana": [],
-        "No pose detected": [],
-    }
-    return feedback_map.get(pose, [])
+log = logging.getLogger(__name__)
 
 @video_bp.route('/dashboard')
 def dashboard():
@@ -27,12 +26,17 @@ def dashboard():
         return redirect(url_for('login.signin'))
 
     user_id = session.get('user_id')
-    videos = get_all_videos(user_id)
-    total_videos = len(videos)
+    total_videos = get_video_counts(user_id)['total']
+
+    return render_template('dashboard.html', user=session['user'], total_videos=total_videos)
 
-    return render_template('dashboard.html', user=session['user'], total_videos=total_videos, videos=videos)
 
 
+def _prepare_for_analysis(filepath):
+    """Start the background proxy transcode for a newly saved upload."""
+    if current_app.config.get('ANALYSIS_USE_PROXY'):
+        schedule_proxy(filepath)
+
 
 @video_bp.route('/upload', methods=['GET', 'POST'])
 def upload_video():
@@ -43,35 +47,19 @@ def upload_video():
     user_id = session['user_id']
 
     if request.method == 'POST':
-        # ✅ 1. Handle recorded camera video (base64)
-        base64_video = request.form.get('camera-video-data')
-        if base64_video and base64_video.startswith('data:video/webm;base64,'):
-            try:
-                video_data = base64.b64decode(base64_video.split(',')[1])
-                filename = f"camera_{uuid.uuid4().hex}.webm"
-                filepath = os.path.join(upload_folder, filename)
-
-                with open(filepath, 'wb') as f:
-                    f.write(video_data)
-
-                relative_url = os.path.join('static', 'videos', filename).replace("\\", "/")
-                save_video_info(filename, relative_url, user_id)
-                flash('Camera video uploaded successfully!')
-                return redirect(url_for('video.uploaded_videos'))
-            except Exception as e:
-                print("Camera video upload error:", e)
-                flash('Failed to upload camera video.')
-                return redirect(url_for('video.upload_video'))
-
-        # ✅ 2. Handle file upload from input[type=file]
+        # Refuse oversized bodies before Flask parses (and buffers) the form
+        max_bytes = current_app.config.get('MAX_VIDEO_UPLOAD_BYTES')
+        if max_bytes and request.content_length and request.content_length > max_bytes + 64 * 1024:
+            flash('Upload is larger than the allowed size.')
+            return redirect(url_for('video.upload_video'))
+
+        # Recordings arrive through the chunked upload API; this handles input[type=file]
         file = request.files.get('file')
         if file and file.filename:
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(upload_folder, filename)
-            file.save(filepath)
-
-            relative_url = os.path.join('static', 'videos', filename).replace("\\", "/")
-            save_video_info(filename, relative_url, user_id)
+            # Stored by content hash; the original name is kept for display only
+            filename = secure_filename(file.filename) or 'upload.mp4'
+            _, filepath = video_storage.store_stream(file.stream, upload_folder, user_id, filename)
+            _prepare_for_analysis(filepath)
             flash('Video uploaded successfully!')
             return redirect(url_for('video.uploaded_videos'))
 
@@ -79,16 +67,94 @@ def upload_video():
         return redirect(request.url)
 
     # GET request
-    videos = get_all_videos(user_id)
-    return render_template('dashboard.html', user=session.get('user'), videos=videos)
+    total_videos = get_video_counts(user_id)['total']
+    return render_template('dashboard.html', user=session.get('user'), total_videos=total_videos)
+
+
+# ========== Chunked Uploads ==========
+
+def _upload_error(e):
+    payload = {"error": str(e)}
+    if e.received is not None:
+        payload["received"] = e.received
+    return jsonify(payload), e.status
+
 
+def _owned_upload(upload_id):
+    upload = get_chunked_upload(upload_id)
+    if not upload or upload['user_id'] != session['user_id']:
+        return None
+    return upload
+
+
+@video_bp.route('/uploads/chunked', methods=['POST'])
+def start_chunked_upload():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not signed in."}), 401
+
+    payload = request.get_json(silent=True) or {}
+    try:
+        upload = start_upload(
+            session['user_id'], payload.get('filename'), current_app.config['UPLOAD_FOLDER'],
+            total_size=payload.get('size'), max_bytes=current_app.config.get('MAX_VIDEO_UPLOAD_BYTES')
+        )
+    except UploadError as e:
+        return _upload_error(e)
+
+    return jsonify({
+        "upload_id": upload['id'],
+        "received": upload['received'],
+        "chunk_size": MAX_CHUNK_BYTES,
+        "upload_url": url_for('video.chunked_upload', upload_id=upload['id']),
+        "complete_url": url_for('video.complete_chunked_upload', upload_id=upload['id']),
+    }), 201
+
+
+@video_bp.route('/uploads/chunked/<upload_id>', methods=['GET', 'PUT'])
+def chunked_upload(upload_id):
+    """GET reports how many bytes arrived (to resume); PUT appends a chunk at ?offset=."""
+    if 'user_id' not in session:
+        return jsonify({"error": "Not signed in."}), 401
+
+    upload = _owned_upload(upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found."}), 404
+    if request.method == 'GET':
+        return jsonify({"upload_id": upload_id, "received": upload['received'], "status": upload['status']})
+
+    try:
+        received = append_chunk(
+            upload, request.args.get('offset', 0, type=int), request.stream, request.content_length,
+            current_app.config['UPLOAD_FOLDER'], max_bytes=current_app.config.get('MAX_VIDEO_UPLOAD_BYTES')
+        )
+    except UploadError as e:
+        return _upload_error(e)
+    return jsonify({"upload_id": upload_id, "received": received})
+
+
+@video_bp.route('/uploads/chunked/<upload_id>/complete', methods=['POST'])
+def complete_chunked_upload(upload_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not signed in."}), 401
+
+    upload = _owned_upload(upload_id)
+    if not upload:
+        return jsonify({"error": "Upload not found."}), 404
+
+    try:
+        video_id = complete_upload(upload, current_app.config['UPLOAD_FOLDER'])
+    except UploadError as e:
+        return _upload_error(e)
+    _prepare_for_analysis(os.path.join(current_app.root_path, get_video_by_id(video_id)['url']))
+
+    flash('Video uploaded successfully!')
+    return jsonify({"video_id": video_id, "videos_url": url_for('video.uploaded_videos')})
 
-from flask import send_from_directory
 
 @video_bp.route('/uploads/<path:filename>')
 def uploaded_file(filename):
-    upload_folder = current_app.config['UPLOAD_FOLDER']
-    return send_from_directory(upload_folder, filename)
+    # Range requests, ETag / Last-Modified revalidation and long caching for hashed names
+    return send_media(current_app.root_path, current_app.config['UPLOAD_FOLDER'], filename)
 
 
 
@@ -100,46 +166,47 @@ def uploaded_videos():
     user_id = session['user_id']
     user_email = session['user']  # Get email from session
 
-    videos = get_all_videos(user_id)
-
-    # Count analyzed videos (with prediction_id present)
-    analyzed_count = sum(1 for video in videos if video.get('prediction_id'))
+    page = get_videos_page(
+        user_id,
+        after_id=request.args.get('after', type=int),
+        before_id=request.args.get('before', type=int)
+    )
+    counts = get_video_counts(user_id)
 
     return render_template(
         'uploaded_videos.html',
-        videos=videos,
-        uploads=videos,  # Optional alias
-        analyzed_count=analyzed_count,
-        username=user_email.split('@')[0]  # Use email safely
+        videos=page['videos'],
+        uploads=page['videos'],  # Optional alias
+        total_videos=counts['total'],
+        analyzed_count=counts['analyzed'],
+        next_after=page['next_after'],
+        prev_before=page['prev_before'],
+        username=user_email.split('@')[0],  # Use email safely
+        media_name=video_storage.media_name
     )
 
 
 
 
-from db_services import delete_video_by_id, get_prediction_by_video_id, delete_prediction_by_id
-
 @video_bp.route('/delete/<int:video_id>', methods=['POST'])
 def delete_video(video_id):
     if 'user' not in session or 'user_id' not in session:
         return redirect(url_for('login.signin'))
 
     user_id = session['user_id']
-    videos = get_all_videos(user_id)
-    video_to_delete = next((v for v in videos if v['id'] == video_id), None)
+    video_to_delete = get_video_for_user(video_id, user_id)
 
     if video_to_delete:
-        # 1. Delete the physical video file
-        file_path = os.path.join(current_app.root_path, video_to_delete['url'])
-        if os.path.exists(file_path):
-            os.remove(file_path)
-
-        # 2. Delete the prediction associated with this video (if any)
-        prediction = get_prediction_by_video_id(video_id)
-        if prediction:
-            delete_prediction_by_id(prediction['id'])
-
-        # 3. Delete video record from DB
-        delete_video_by_id(video_id)
+        # Delete the video record (predictions, jobs and track row cascade with it). The
+        # file and what was derived from it go only if no other video shares the bytes;
+        # landmarks may have been extracted from the file or from its proxy, for any of them.
+        unlinked = video_storage.delete_video(video_id, current_app.root_path)
+        if unlinked:
+            for source in (unlinked, proxy_path_for(unlinked)):
+                landmark_store.remove_track_files(source)
+            remove_proxy(unlinked)
+            video_storage.prune(unlinked)
+        result_pages.invalidate_video(video_id)
 
         flash('Video and associated prediction deleted successfully!')
     else:
@@ -151,10 +218,46 @@ def delete_video(video_id):
 
 
 
-from collections import Counter
-from db_services import update_prediction
+def _wants_json():
+    return request.accept_mimetypes.best == 'application/json' or request.is_json
+
+
+def _job_payload(job):
+    frames_total = job['frames_total'] or 0
+    payload = {
+        "job_id": job['id'],
+        "video_id": job['video_id'],
+        "status": job['status'],
+        "frames_done": job['frames_done'],
+        "frames_total": frames_total,
+        "percent": round(job['frames_done'] / frames_total * 100, 1) if frames_total else None,
+        "error": job['error'],
+        "status_url": url_for('video.job_status', job_id=job['id']),
+        "progress_url": url_for('video.job_progress', job_id=job['id']),
+    }
+    if job['prediction_id']:
+        payload["prediction_id"] = job['prediction_id']
+        payload["result_url"] = url_for('video.view_result', prediction_id=job['prediction_id'])
+    return payload
+
+
+def _reuse_result(video_id, source_path, cache_key, options):
+    """A cached result for `source_path`, or one reclassified from its stored landmarks, else None."""
+    cached = result_cache.lookup(cache_key, **options)
+    if cached is not None:
+        return cached
+
+    # Landmarks from an earlier pass only need the classifier rerun (e.g. after a
+    # model swap), which takes milliseconds, so answer inline instead of queueing
+    track = landmark_store.find_track(video_id, source_path, **options)
+    if track is None:
+        return None
+    reclassified = landmark_store.reclassify(track)
+    if "frames_sampled_every" not in reclassified:
+        return None
+    result_cache.store(cache_key, reclassified, **options)
+    return reclassified
 
-from db_services import save_prediction  # ✅ import the function
 
 @video_bp.route('/analyze/<int:video_id>', methods=['POST'])
 def analyze_video(video_id):
@@ -162,122 +265,158 @@ def analyze_video(video_id):
         return redirect(url_for('login.signin'))
 
     user_id = session['user_id']
-    videos = get_all_videos(user_id)
-    video = next((v for v in videos if v['id'] == video_id), None)
+    video = get_video_for_user(video_id, user_id)
 
     if not video:
+        if _wants_json():
+            return jsonify({"error": "Video not found."}), 404
         flash('Video not found.')
         return redirect(url_for('video.uploaded_videos'))
 
     file_path = os.path.join(current_app.root_path, video['url'])
     if not os.path.exists(file_path):
+        if _wants_json():
+            return jsonify({"error": "Video file is missing."}), 404
         flash('Video file is missing.')
         return redirect(url_for('video.uploaded_videos'))
 
-    result = process_video(file_path)
-    correct = result["score"] >= 60
-    video_filename = os.path.basename(video['url'])
-
-    feedback_list = get_feedback_for_pose(result["label"]) or [result["feedback"]]
-    feedback_string = ', '.join(feedback_list)
+    options = dict(
+        stride=current_app.config.get('ANALYSIS_FRAME_STRIDE', 1),
+        target_fps=current_app.config.get('ANALYSIS_TARGET_FPS'),
+        early_exit_z=current_app.config.get('ANALYSIS_EARLY_EXIT_Z')
+    )
 
-    existing_prediction = get_prediction_by_video_id(video_id)
+    # Videos uploaded before hashing existed get their hash on first analysis
+    content_hash = video.get('content_hash')
+    if not content_hash:
+        content_hash = hash_file(file_path)
+        set_video_content_hash(video_id, content_hash)
+
+    # Reuse what an earlier pass left: first for the original, then for the downscaled
+    # proxy. Proxy results are cached apart from full-resolution ones since the sampled
+    # frames differ; an original-resolution result (e.g. from before the proxy was ready)
+    # is never thrown away just because a proxy exists now.
+    sources = [(file_path, content_hash)]
+    proxy_path = analysis_source(file_path) if current_app.config.get('ANALYSIS_USE_PROXY') else file_path
+    if proxy_path != file_path:
+        sources.append((proxy_path, f"{content_hash}:proxy{PROXY_VERSION}"))
+
+    cached = None
+    for source_path, cache_key in sources:
+        cached = _reuse_result(video_id, source_path, cache_key, options)
+        if cached is not None:
+            break
+
+    if cached is not None:
+        prediction_id = store_analysis_result(video_id, cached)
+        job_id = create_analysis_job(video_id, user_id)
+        update_job_status(job_id, 'done', prediction_id=prediction_id)
+        if _wants_json():
+            return jsonify(_job_payload(get_analysis_job(job_id))), 200
+        return redirect(url_for('video.view_result', prediction_id=prediction_id))
+
+    analyze = analyze_video_parallel if current_app.config.get('ANALYSIS_USE_PROCESS_POOL') else process_video_batched
+    queue = get_job_queue(
+        analyze,
+        max_workers=current_app.config.get('ANALYSIS_MAX_WORKERS', 2),
+        max_queued=current_app.config.get('ANALYSIS_MAX_QUEUED', 8)
+    )
 
-    if existing_prediction:
-        update_prediction(
-            video_id=video_id,
-            pose_name=result["label"],
-            score=result["score"],
-            confidence=result["score"],
-            is_correct=correct,
-            verdict="✅ Pose performed correctly!" if correct else "❌ Pose performed incorrectly!",
-            feedback=feedback_string
-        )
-    else:
-        save_prediction(
-            video_id=video_id,
-            pose_name=result["label"],
-            score=result["score"],
-            confidence=result["score"],
-            is_correct=correct,
-            verdict="✅ Pose performed correctly!" if correct else "❌ Pose performed incorrectly!",
-            feedback=feedback_string
-        )
+    # A new pass reads the proxy when it is ready
+    source_path, cache_key = sources[-1]
+    try:
+        job_id = queue.submit(video_id, user_id, source_path, content_hash=cache_key, **options)
+    except JobQueueFull as e:
+        if _wants_json():
+            response = jsonify({"error": str(e)})
+            response.headers['Retry-After'] = '10'
+            return response, 503
+        flash(str(e))
+        return redirect(url_for('video.uploaded_videos'))
 
-    # ✅ Now always define analysis here
-    analysis = {
-        "pose_name": result["label"],
-        "score": result["score"],
-        "confidence": result["score"],
-        "is_correct": correct,
-        "verdict": "✅ Pose performed correctly!" if correct else "❌ Pose performed incorrectly!",
-        "feedback": feedback_list,
-        "video_url": video_filename,
-        "media_type": 'video'
-    }
+    if _wants_json():
+        return jsonify(_job_payload(get_analysis_job(job_id))), 202
 
-    return render_template(
-        'prediction_result.html',
-        video=video,
-        video_url=video_filename,
-        analysis=analysis,
-        media_type='video'
-    )
+    flash('Analysis started.')
+    return redirect(url_for('video.uploaded_videos'))
 
-# ... (all your existing imports and routes remain unchanged)
 
-from db_services import save_prediction, get_prediction_by_id, get_video_by_id # ✅ make sure you have this function
+@video_bp.route('/jobs/<int:job_id>')
+def job_status(job_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not signed in."}), 401
 
-@video_bp.route('/view_result/<int:prediction_id>')
-def view_result(prediction_id):
-    if 'user' not in session:
-        return redirect(url_for('login.signin'))
+    job = get_analysis_job(job_id)
+    if not job or job['user_id'] != session['user_id']:
+        return jsonify({"error": "Job not found."}), 404
+    return jsonify(_job_payload(job))
 
-    prediction = get_prediction_by_id(prediction_id)
-    user_id = session['user_id']
-    user_email = session['user']  # Email from session
 
-    videos = get_all_videos(user_id)
+@video_bp.route('/jobs/<int:job_id>/progress')
+def job_progress(job_id):
+    if 'user_id' not in session:
+        return jsonify({"error": "Not signed in."}), 401
 
-    if not prediction:
-        flash('Prediction not found.')
-        return redirect(url_for('video.uploaded_videos'))
+    job = get_analysis_job(job_id)
+    if not job or job['user_id'] != session['user_id']:
+        return jsonify({"error": "Job not found."}), 404
 
-    feedback_list = prediction.get('feedback', [])
+    payload = _job_payload(job)
+    return jsonify({key: payload[key] for key in ("job_id", "status", "frames_done", "frames_total", "percent")})
 
-    # ✅ Get video_id from prediction
-    video_id = prediction["video_id"]
 
-    # ✅ Get the video by video_id (you must have this function implemented)
-    video = get_video_by_id(video_id)
+@video_bp.route('/analysis/cache-stats')
+def analysis_cache_stats():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not signed in."}), 401
+    return jsonify(result_cache.stats())
 
-    # If video not found, use fallback
-    if not video:
-        flash("Video not found for the prediction.")
-        return redirect(url_for('video.uploaded_videos'))
 
-    analysis = {
-        "pose_name": prediction["pose_name"],
-        "score": prediction["score"],
-        "confidence": prediction["confidence"],
-        "is_correct": bool(prediction["is_correct"]),
-        "verdict": prediction["verdict"],
-        "feedback": feedback_list,
-        "video_url": video["fileName"],  # ✅ Use filename from fetched video
-        "media_type": 'video'
-    }
+@video_bp.route('/view_result/<int:prediction_id>')
+def view_result(prediction_id):
+    if 'user' not in session:
+        return redirect(url_for('login.signin'))
 
-    # ✅ Construct video dict properly
-    video_data = {
-        "id": video["id"],
-        "fileName": video["fileName"],
-        "url": os.path.join("static", "videos", video["fileName"]),
-    }
+    # Served from the result page cache; re-analysis and deletes invalidate it
+    page = result_pages.get_result_page(prediction_id)
+    if not page or page['user_id'] != session['user_id']:
+        flash('Prediction not found.')
+        return redirect(url_for('video.uploaded_videos'))
 
     return render_template(
         'results_db.html',
-        videos=videos,
-        uploads=videos,
-        prediction=analysis,
-        video=video_data
+        prediction=page['prediction'],
+        video=page['video'],
+        segments=page['segments']
     )
+
+
+@video_bp.route('/results/cache-stats')
+def result_page_cache_stats():
+    if 'user_id' not in session:
+        return jsonify({"error": "Not signed in."}), 401
+    return jsonify(result_pages.stats())
+
+
+@video_bp.route('/results/<int:prediction_id>/timeline')
+def result_timeline(prediction_id):
+    """Per-frame labels and probabilities for a result, from the stored landmarks."""
+    if 'user_id' not in session:
+        return jsonify({"error": "Not signed in."}), 401
+
+    page = result_pages.get_result_page(prediction_id)
+    if not page or page['user_id'] != session['user_id']:
+        return jsonify({"error": "Prediction not found."}), 404
+
+    track = landmark_store.get_track(page['video_id'])
+    if not track:
+        return jsonify({"error": "No stored landmarks for this video; analyze it again."}), 404
+    # Classify with the model version that produced this result, not whatever is active now
+    version = page['prediction']['model_version']
+    timeline = landmark_store.frame_timeline(track, version=version)
+    if timeline is None and version:
+        return jsonify({"error": f"Model version {version} is no longer loaded; analyze the video again."}), 409
+    if timeline is None:
+        return jsonify({"error": "Model not loaded."}), 503
+    timeline["segments"] = page['segments']
+    return jsonify(timeline)
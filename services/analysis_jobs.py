@@ -0,0 +1,246 @@
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from db_services import (
+    create_analysis_job, get_active_job_for_video, update_job_status, fail_interrupted_jobs, renew_job_leases,
+    upsert_predictions
+)
+from services import result_cache, landmark_store, result_pages
+
+log = logging.getLogger(__name__)
+
+# ========== Feedback ==========
+
+POSE_FEEDBACK = {
+    "Tadasana": ["Bring your feet together", "Keep your spine straight"],
+    "Bhujangasana": ["Lift your chest higher", "Place hands under shoulders"],
+    "Trikonasana": ["Raise your left arm", "Lower your right hand towards your foot"],
+    "Padmasana": ["Keep your back straight"],
+    "Vrikshasana": ["Balance on one leg", "Keep hands together"],
+    "Shavasana": [],
+    "No pose detected": [],
+}
+
+
+def get_feedback_for_pose(pose):
+    return POSE_FEEDBACK.get(pose, [])
+
+
+def prediction_fields(video_id, result):
+    """The prediction row (with its timeline segments) for an analysis result."""
+    correct = result["score"] >= 60
+    feedback_list = get_feedback_for_pose(result["label"]) or [result["feedback"]]
+    return dict(
+        video_id=video_id,
+        pose_name=result["label"],
+        score=result["score"],
+        confidence=result["score"],
+        is_correct=correct,
+        verdict="✅ Pose performed correctly!" if correct else "❌ Pose performed incorrectly!",
+        feedback=feedback_list,
+        model_version=result.get("model_version"),
+        # Results cached before timelines existed have no segments; clear stale ones anyway
+        segments=result.get("segments", [])
+    )
+
+
+def store_analysis_result(video_id, result):
+    """Write (or overwrite) the prediction row and its timeline for a video. Returns the prediction id."""
+    return get_prediction_writer().submit(prediction_fields(video_id, result)).result()
+
+
+# ========== Prediction Writer ==========
+
+# Upper bound on rows per transaction, so one burst cannot hold the write lock for long
+WRITE_BATCH_MAX = 64
+
+
+class PredictionWriter:
+    """
+    A single thread that upserts prediction rows. Whatever has queued up while the
+    previous transaction was committing goes into the next one, so analyses finishing in
+    a burst share one commit, while a lone result is written right away.
+    """
+
+    def __init__(self, batch_max=WRITE_BATCH_MAX):
+        self._batch_max = batch_max
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="prediction-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fields):
+        """Queue one upsert_prediction row. Returns a Future for its prediction id."""
+        future = Future()
+        self._queue.put((fields, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_max:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch):
+        try:
+            ids = upsert_predictions([fields for fields, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Keep one bad row (e.g. its video was deleted meanwhile) from failing the rest
+            log.warning("Batched prediction write failed (%s), retrying %s rows one by one", e, len(batch))
+            for item in batch:
+                self._write([item])
+            return
+        log.debug("Stored %s predictions in one transaction", len(batch))
+        for (_, future), prediction_id in zip(batch, ids):
+            result_pages.invalidate(prediction_id)
+            future.set_result(prediction_id)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_prediction_writer():
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = PredictionWriter()
+        return _writer
+
+
+# ========== Job Queue ==========
+
+class JobQueueFull(Exception):
+    """Raised when every worker is busy and the wait queue is at capacity."""
+
+
+# Progress rows are written at most this often per job
+PROGRESS_WRITE_INTERVAL = 1.0
+
+# Each queue owns the jobs it accepted and renews their updated_at well within this
+# lease. Jobs nobody renewed for longer belong to a process that died (restart, crashed
+# or recycled worker) and are failed; other live workers' jobs are never touched.
+JOB_LEASE_SECONDS = 60
+
+
+class AnalysisJobQueue:
+    """
+    Bounded background executor for video analysis. At most `max_workers` analyses run
+    at once and at most `max_queued` more may wait; anything beyond that is rejected
+    with JobQueueFull so the request thread can answer immediately.
+    """
+
+    def __init__(self, analyze, max_workers=2, max_queued=8):
+        # analyze(file_path, progress=..., keep_landmarks=True, **options) -> result dict
+        self._analyze = analyze
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._lock = threading.Lock()
+        # Created after any fork, so every worker process gets its own owner id
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stopped = threading.Event()
+        self._leases = threading.Thread(target=self._keep_leases, name="analysis-leases", daemon=True)
+        self._leases.start()
+
+    def submit(self, video_id, user_id, file_path, content_hash=None, **options):
+        """
+        Enqueue an analysis and return its job id (an existing one if already pending).
+        When `content_hash` is given the finished result is written to the result cache.
+        The extracted landmarks are kept in the landmark store for later re-analysis.
+        """
+        with self._lock:
+            active = get_active_job_for_video(video_id)
+            if active:
+                return active["id"]
+
+            if not self._slots.acquire(blocking=False):
+                raise JobQueueFull("Analysis queue is full, try again shortly.")
+
+            job_id = create_analysis_job(video_id, user_id, owner=self.owner)
+
+        try:
+            self._executor.submit(self._run, job_id, video_id, file_path, content_hash, options)
+        except Exception:
+            self._slots.release()
+            update_job_status(job_id, 'failed', error='Could not schedule analysis')
+            raise
+        return job_id
+
+    def _run(self, job_id, video_id, file_path, content_hash, options):
+        last_write = [0.0]
+        latest = [None, None]
+
+        def progress(frames_done, frames_total):
+            latest[:] = [frames_done, frames_total]
+            now = time.monotonic()
+            if now - last_write[0] >= PROGRESS_WRITE_INTERVAL:
+                last_write[0] = now
+                update_job_status(job_id, 'running', frames_done=frames_done, frames_total=frames_total)
+
+        try:
+            update_job_status(job_id, 'running')
+            result = self._analyze(file_path, progress=progress, keep_landmarks=True, **options)
+            landmarks = result.pop("landmarks", None)
+            if landmarks is not None:
+                try:
+                    landmark_store.save_track(
+                        video_id, file_path, *landmarks, result["frames_sampled_every"], **options
+                    )
+                except (OSError, ValueError) as e:
+                    # Only costs a later re-analysis its shortcut; keep the result
+                    log.warning("Could not store landmarks for video %s: %s", video_id, e)
+            # Failures before decoding (bad path, model not loaded) carry no sampling info
+            if "frames_sampled_every" in result:
+                result_cache.store(content_hash, result, **options)
+            prediction_id = store_analysis_result(video_id, result)
+            update_job_status(job_id, 'done', frames_done=latest[0], frames_total=latest[1],
+                              prediction_id=prediction_id)
+            if "frames_processed" in result:
+                log.info("Analysis job %s done: %s frames processed%s", job_id, result["frames_processed"],
+                         " (stopped early)" if result.get("stopped_early") else "")
+        except Exception as e:
+            log.exception("Analysis job %s failed", job_id)
+            update_job_status(job_id, 'failed', error=str(e))
+        finally:
+            self._slots.release()
+
+    def _keep_leases(self):
+        while True:
+            try:
+                renew_job_leases(self.owner)
+                failed = fail_interrupted_jobs(JOB_LEASE_SECONDS)
+                if failed:
+                    log.warning("Failed %s analysis jobs whose process stopped renewing them", failed)
+            except Exception:
+                log.exception("Could not renew analysis job leases")
+            if self._stopped.wait(JOB_LEASE_SECONDS / 3):
+                return
+
+    def shutdown(self, wait=True):
+        self._stopped.set()
+        self._executor.shutdown(wait=wait)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue(analyze, max_workers=2, max_queued=8):
+    """Return the process-wide job queue, creating it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = AnalysisJobQueue(analyze, max_workers=max_workers, max_queued=max_queued)
+        return _queue
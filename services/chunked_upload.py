@@ -0,0 +1,205 @@
+import logging
+import os
+import threading
+import time
+import uuid
+
+from werkzeug.utils import secure_filename
+
+from db_services import (
+    create_chunked_upload, get_chunked_upload, update_chunked_upload, count_open_uploads, expire_chunked_uploads
+)
+from services.hashing import HASH_CHUNK_SIZE, new_content_hash, hash_file
+from services.video_storage import store_file
+
+# Resumable uploads: the client opens an upload, PUTs the file in order as raw binary
+# chunks (each tagged with its byte offset) and then completes it. Chunks are streamed
+# to a partial file block by block, so memory stays flat however long the recording is.
+# The content hash is updated as bytes arrive; if this process did not see every chunk
+# (resumed on another worker, or after a restart) it is recomputed from the file.
+
+# Uploads that received nothing for UPLOAD_EXPIRY_SECONDS are expired and their partial
+# files deleted; the sweep runs at most every SWEEP_INTERVAL when uploads are started.
+
+MAX_CHUNK_BYTES = 8 * 1024 * 1024
+PARTIAL_DIR = '.partial'
+UPLOAD_EXPIRY_SECONDS = int(os.environ.get('CHUNKED_UPLOAD_EXPIRY_SECONDS', 24 * 3600))
+MAX_OPEN_UPLOADS_PER_USER = int(os.environ.get('CHUNKED_UPLOAD_MAX_OPEN', 5))
+SWEEP_INTERVAL = 600
+
+log = logging.getLogger(__name__)
+
+
+class UploadError(Exception):
+    """An upload request that cannot be accepted. `status` is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400, received=None):
+        super().__init__(message)
+        self.status = status
+        self.received = received
+
+
+_hashers = {}  # upload id -> (running sha256, bytes hashed)
+_locks = {}
+_locks_guard = threading.Lock()
+_next_sweep = 0.0
+
+
+def _lock_for(upload_id):
+    with _locks_guard:
+        return _locks.setdefault(upload_id, threading.Lock())
+
+
+def partial_path(upload_folder, upload_id):
+    return os.path.join(upload_folder, PARTIAL_DIR, f"{upload_id}.part")
+
+
+def _forget(upload_id):
+    _hashers.pop(upload_id, None)
+    with _locks_guard:
+        _locks.pop(upload_id, None)
+
+
+def sweep_expired(upload_folder):
+    """Expire abandoned uploads, delete their partial files and drop what this process kept for them."""
+    for upload_id in expire_chunked_uploads(UPLOAD_EXPIRY_SECONDS):
+        with _lock_for(upload_id):
+            try:
+                os.remove(partial_path(upload_folder, upload_id))
+            except OSError:
+                pass
+        _forget(upload_id)
+
+    # Uploads this process saw chunks for but that were expired or completed elsewhere
+    with _locks_guard:
+        known = set(_hashers) | set(_locks)
+    for upload_id in known:
+        upload = get_chunked_upload(upload_id)
+        if upload is None or upload["status"] != 'open':
+            _forget(upload_id)
+
+
+def _maybe_sweep(upload_folder):
+    global _next_sweep
+    now = time.monotonic()
+    with _locks_guard:
+        if now < _next_sweep:
+            return
+        _next_sweep = now + SWEEP_INTERVAL
+    try:
+        sweep_expired(upload_folder)
+    except Exception as e:
+        log.warning("Sweeping expired uploads failed: %s", e)
+
+
+def _check_open(upload):
+    if upload["status"] == 'expired':
+        raise UploadError("Upload has expired", status=410)
+    if upload["status"] != 'open':
+        raise UploadError("Upload is already complete", status=409)
+
+
+def start_upload(user_id, filename, upload_folder, total_size=None, max_bytes=None):
+    """
+    Open a new upload. Rejects a declared size over the limit before any bytes are sent,
+    and a user who already has MAX_OPEN_UPLOADS_PER_USER uploads in progress.
+    """
+    _maybe_sweep(upload_folder)
+    if total_size is not None:
+        try:
+            total_size = int(total_size)
+        except (TypeError, ValueError):
+            raise UploadError("Invalid size")
+        if total_size < 0:
+            raise UploadError("Invalid size")
+        if max_bytes and total_size > max_bytes:
+            raise UploadError("File is larger than the upload limit", status=413)
+    if count_open_uploads(user_id) >= MAX_OPEN_UPLOADS_PER_USER:
+        raise UploadError("Too many uploads in progress", status=429)
+
+    upload_id = uuid.uuid4().hex
+    os.makedirs(os.path.join(upload_folder, PARTIAL_DIR), exist_ok=True)
+    open(partial_path(upload_folder, upload_id), 'wb').close()
+
+    create_chunked_upload(upload_id, user_id, secure_filename(filename or '') or 'upload.webm', total_size)
+    _hashers[upload_id] = (new_content_hash(), 0)
+    return get_chunked_upload(upload_id)
+
+
+def append_chunk(upload, offset, stream, length, upload_folder, max_bytes=None):
+    """
+    Stream one chunk from `stream` onto the partial file. `offset` must equal the bytes
+    already received, which makes a retried or duplicated chunk harmless. Returns the new
+    received count.
+    """
+    upload_id = upload["id"]
+    _check_open(upload)
+    if length is None:
+        raise UploadError("Content-Length is required", status=411)
+    if length > MAX_CHUNK_BYTES:
+        raise UploadError("Chunk is too large", status=413)
+
+    with _lock_for(upload_id):
+        current = get_chunked_upload(upload_id)
+        _check_open(current)  # may have expired since the caller looked it up
+        received = current["received"]
+        if offset != received:
+            raise UploadError("Offset does not match the bytes received", status=409, received=received)
+
+        limit = upload["total_size"] if upload["total_size"] is not None else max_bytes
+        if limit and received + length > limit:
+            raise UploadError("Upload exceeds its size limit", status=413, received=received)
+
+        hasher, hashed = _hashers.get(upload_id, (None, None))
+        if hashed != received:
+            hasher = None  # missed earlier chunks here; hash the file at completion
+
+        path = partial_path(upload_folder, upload_id)
+        written = 0
+        with open(path, 'r+b') as out:
+            out.seek(received)
+            out.truncate()  # drop the tail of a chunk that failed half way
+            while written < length:
+                block = stream.read(min(HASH_CHUNK_SIZE, length - written))
+                if not block:
+                    break
+                out.write(block)
+                if hasher is not None:
+                    hasher.update(block)
+                written += len(block)
+
+        if written != length:
+            _hashers.pop(upload_id, None)
+            raise UploadError("Chunk ended early", status=400, received=received)
+
+        received += written
+        update_chunked_upload(upload_id, received=received)
+        if hasher is not None:
+            _hashers[upload_id] = (hasher, received)
+        else:
+            _hashers.pop(upload_id, None)
+        return received
+
+
+def complete_upload(upload, upload_folder):
+    """Hand the finished file to video storage, which creates its videos row. Returns the video id."""
+    upload_id = upload["id"]
+    with _lock_for(upload_id):
+        upload = get_chunked_upload(upload_id)
+        if upload["status"] == 'complete':
+            return upload["video_id"]
+        _check_open(upload)
+        if upload["total_size"] is not None and upload["received"] != upload["total_size"]:
+            raise UploadError("Upload is incomplete", status=409, received=upload["received"])
+        if not upload["received"]:
+            raise UploadError("Upload is empty")
+
+        path = partial_path(upload_folder, upload_id)
+        hasher, hashed = _hashers.pop(upload_id, (None, None))
+        content_hash = hasher.hexdigest() if hashed == upload["received"] else hash_file(path)
+
+        video_id, _ = store_file(path, content_hash, upload_folder, upload["user_id"], upload["filename"])
+        update_chunked_upload(upload_id, status='complete', video_id=video_id)
+
+    _forget(upload_id)
+    return video_id
@@ -0,0 +1,175 @@
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import re
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from db_services import add_user, get_user_credentials, update_user_password
+
+log = logging.getLogger(__name__)
+
+# ========== Password Hashing ==========
+
+# Passwords are stored as salted hashes from a deliberately slow KDF, encoded as
+#   scrypt$<n>$<r>$<p>$<salt>$<hash>   or   pbkdf2_sha256$<iterations>$<salt>$<hash>
+# (salt and hash base64). Rows from before this scheme hold an unsalted SHA-256 hex
+# digest; they still verify, and are rehashed with the current KDF on that login.
+# The same happens when the cost parameters below are raised.
+
+PASSWORD_KDF = os.environ.get('PASSWORD_KDF', 'scrypt')
+SCRYPT_N = int(os.environ.get('SCRYPT_N', 2 ** 14))
+SCRYPT_R = int(os.environ.get('SCRYPT_R', 8))
+SCRYPT_P = int(os.environ.get('SCRYPT_P', 1))
+PBKDF2_ITERATIONS = int(os.environ.get('PBKDF2_ITERATIONS', 600_000))
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+_LEGACY_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _scrypt(password, salt, n, r, p):
+    # maxmem must cover 128 * r * n bytes plus some slack
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * r * n + 1024 * 1024, dklen=HASH_BYTES)
+
+
+def hash_password(password):
+    """Encode a new salted hash of `password` with the configured KDF."""
+    salt = secrets.token_bytes(SALT_BYTES)
+    if PASSWORD_KDF == 'pbkdf2':
+        digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt, PBKDF2_ITERATIONS, HASH_BYTES)
+        return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(digest)}"
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+
+
+def _is_current(stored):
+    if PASSWORD_KDF == 'pbkdf2':
+        return stored.startswith(f"pbkdf2_sha256${PBKDF2_ITERATIONS}$")
+    return stored.startswith(f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+
+
+def verify_password(password, stored):
+    """
+    Check `password` against a stored hash in any supported format. Returns
+    (matches, needs_rehash); needs_rehash is True for a match whose hash is legacy
+    SHA-256 or uses other cost parameters than the current ones.
+    """
+    if _LEGACY_SHA256.match(stored):
+        matches = hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+        return matches, matches
+
+    parts = stored.split('$')
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            expected = base64.b64decode(parts[5])
+            candidate = _scrypt(password, base64.b64decode(parts[4]), n, r, p)
+        elif parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            expected = base64.b64decode(parts[3])
+            candidate = hashlib.pbkdf2_hmac('sha256', password.encode(), base64.b64decode(parts[2]),
+                                            int(parts[1]), len(expected))
+        else:
+            log.warning("Unrecognized password hash format")
+            return False, False
+    except ValueError:
+        log.warning("Malformed password hash")
+        return False, False
+
+    matches = hmac.compare_digest(candidate, expected)
+    return matches, matches and not _is_current(stored)
+
+
+# Verified against when the email is unknown, so both cases cost the same
+_dummy_hash = None
+
+
+def _unknown_user_hash():
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(secrets.token_hex(8))
+    return _dummy_hash
+
+
+# ========== Verification Pool ==========
+
+class CredentialsBusy(Exception):
+    """Raised when the hashing pool and its wait queue are full (a login spike)."""
+
+
+class CredentialPool:
+    """
+    Runs KDF work on at most `max_workers` threads with at most `max_queued` more
+    waiting. hashlib releases the GIL while hashing, so the workers use separate cores,
+    but a burst of logins can never take more than this share of the machine; beyond
+    the queue, callers get CredentialsBusy immediately instead of piling up.
+    """
+
+    def __init__(self, max_workers=None, max_queued=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queued = self.max_workers * 4 if max_queued is None else max_queued
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="credentials")
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queued)
+
+    def run(self, fn, *args, timeout=None):
+        if not self._slots.acquire(blocking=False):
+            raise CredentialsBusy("Too many sign-in attempts right now, please try again shortly.")
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result(timeout=timeout)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_credential_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = int(os.environ.get('AUTH_WORKERS', 0)) or None
+            queued = os.environ.get('AUTH_MAX_QUEUED')
+            _pool = CredentialPool(workers, int(queued) if queued else None)
+        return _pool
+
+
+# ========== Accounts ==========
+
+def register_user(name, email, password):
+    """Create an account with a freshly salted hash. Raises ValueError if the email is taken."""
+    password_hash = get_credential_pool().run(hash_password, password)
+    add_user(name, email, password_hash)
+
+
+def authenticate(email, password):
+    """
+    Return (user id, name) if the password matches, else None. Legacy or outdated
+    hashes are replaced with a current one on a successful login.
+    """
+    user = get_user_credentials(email)
+    stored = user["password"] if user else _unknown_user_hash()
+    pool = get_credential_pool()
+
+    matches, needs_rehash = pool.run(verify_password, password, stored)
+    if not user or not matches:
+        return None
+
+    if needs_rehash:
+        update_user_password(user["id"], pool.run(hash_password, password))
+        log.info("Upgraded password hash for user %s", user["id"])
+    return user["id"], user["name"]
@@ -0,0 +1,30 @@
+import hashlib
+
+# Read/write block size for streaming hashes and copies
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def new_content_hash():
+    return hashlib.sha256()
+
+
+def save_and_hash(stream, dest_path, chunk_size=HASH_CHUNK_SIZE):
+    """Copy a readable stream to `dest_path` block by block, hashing as it goes. Returns the hex digest."""
+    digest = new_content_hash()
+    with open(dest_path, 'wb') as out:
+        while True:
+            block = stream.read(chunk_size)
+            if not block:
+                break
+            digest.update(block)
+            out.write(block)
+    return digest.hexdigest()
+
+
+def hash_file(path, chunk_size=HASH_CHUNK_SIZE):
+    """Streaming SHA-256 of a file on disk."""
+    digest = new_content_hash()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
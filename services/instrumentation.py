@@ -0,0 +1,131 @@
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ========== Logging ==========
+
+# Modules log through logging.getLogger(__name__). Per-frame and per-call messages on the
+# hot paths are DEBUG, so at the default INFO level they cost one level check and no I/O.
+# LOG_LEVEL picks the level, LOG_FORMAT=json emits one JSON object per line.
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_configured = False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=None, fmt=None):
+    """Set up the root handler once, from LOG_LEVEL / LOG_FORMAT unless given."""
+    global _configured
+    if _configured:
+        return
+    handler = logging.StreamHandler()
+    if (fmt or os.environ.get('LOG_FORMAT', '')).lower() == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel((level or os.environ.get('LOG_LEVEL', 'INFO')).upper())
+    _configured = True
+
+
+# ========== Stage Timings ==========
+
+# Timing spans feed one latency histogram per stage (decode, color_convert, pose,
+# classify, db_write, ...). render_prometheus() exports them in the Prometheus text
+# format. Histograms are per process: video pool workers keep their own.
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') == '1'
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_NAME = "yogaalign_stage_seconds"
+
+
+class Histogram:
+    """Fixed-bucket latency histogram (seconds)."""
+
+    __slots__ = ("counts", "total", "count", "lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        slot = bisect.bisect_left(BUCKETS, seconds)
+        with self.lock:
+            self.counts[slot] += 1
+            self.total += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self.lock:
+            return list(self.counts), self.total, self.count
+
+
+_histograms = {}
+_histograms_lock = threading.Lock()
+
+
+def _histogram(stage):
+    histogram = _histograms.get(stage)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.setdefault(stage, Histogram())
+    return histogram
+
+
+def observe(stage, seconds):
+    if METRICS_ENABLED:
+        _histogram(stage).observe(seconds)
+
+
+@contextmanager
+def span(stage):
+    """Time the `with` block into the `stage` histogram."""
+    if not METRICS_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _histogram(stage).observe(time.perf_counter() - started)
+
+
+def render_prometheus():
+    """All stage histograms in the Prometheus text exposition format."""
+    with _histograms_lock:
+        stages = sorted(_histograms.items())
+
+    lines = [
+        f"# HELP {METRIC_NAME} Time spent per pipeline stage.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+    for stage, histogram in stages:
+        counts, total, count = histogram.snapshot()
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS + (None,), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound is None else repr(bound)
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+        lines.append(f'{METRIC_NAME}_sum{{stage="{stage}"}} {total!r}')
+        lines.append(f'{METRIC_NAME}_count{{stage="{stage}"}} {count}')
+    return "\n".join(lines) + "\n"
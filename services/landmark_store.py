@@ -0,0 +1,142 @@
+import json
+import os
+
+import numpy as np
+
+from db_services import save_landmark_track, get_landmark_track
+
+# ========== Landmark Store ==========
+
+# Pose estimation is by far the most expensive part of an analysis. Each analysis keeps
+# the landmarks it extracted: a float32 (frames, 33, 3) array of x, y, visibility plus
+# a float64 array of timestamps in seconds, saved as .npy files next to the analyzed
+# video. The landmark_tracks table points a video at them. Re-analysis (for example
+# after a model swap) memory-maps the arrays and only reruns the classifier.
+
+LANDMARK_DIR = '.landmarks'
+
+
+def track_paths(video_path):
+    """(landmarks path, timestamps path) for the track of `video_path`."""
+    folder, name = os.path.split(video_path)
+    stem = os.path.join(folder, LANDMARK_DIR, os.path.splitext(name)[0])
+    return f"{stem}.landmarks.npy", f"{stem}.times.npy"
+
+
+def _times_path(landmarks_path):
+    return landmarks_path[:-len(".landmarks.npy")] + ".times.npy"
+
+
+def sampling_key(source_path, stride=1, target_fps=None, early_exit_z=None):
+    """Everything besides the classifier that decides which landmarks a pass extracts."""
+    from services.yoga_model import POSE_SETTINGS
+
+    sampling = {"source": os.path.basename(source_path), "pose": POSE_SETTINGS,
+                "stride": stride, "target_fps": target_fps}
+    if early_exit_z:
+        sampling["early_exit_z"] = early_exit_z  # an early-exit track covers only part of the video
+    return json.dumps(sampling, sort_keys=True)
+
+
+def _save_array(path, array):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as out:
+        np.save(out, array)
+    os.replace(tmp_path, path)
+
+
+def save_track(video_id, source_path, landmarks, timestamps, frames_sampled_every, **options):
+    """Write the arrays for one analysis pass of `source_path` and record them for the video."""
+    landmarks_path, times_path = track_paths(source_path)
+    os.makedirs(os.path.dirname(landmarks_path), exist_ok=True)
+    _save_array(landmarks_path, np.ascontiguousarray(landmarks, dtype=np.float32))
+    _save_array(times_path, np.ascontiguousarray(timestamps, dtype=np.float64))
+    save_landmark_track(
+        video_id, landmarks_path, int(landmarks.shape[0]), int(frames_sampled_every),
+        sampling_key(source_path, **options)
+    )
+    return landmarks_path
+
+
+def load_track(track):
+    """Memory-map a stored track. Returns (landmarks, timestamps); nothing is read up front."""
+    landmarks = np.load(track["path"], mmap_mode='r')
+    timestamps = np.load(_times_path(track["path"]), mmap_mode='r')
+    return landmarks, timestamps
+
+
+def get_track(video_id):
+    """The stored track for a video, or None if there is none or its files are gone."""
+    track = get_landmark_track(video_id)
+    if track is None:
+        return None
+    if not (os.path.exists(track["path"]) and os.path.exists(_times_path(track["path"]))):
+        return None
+    return track
+
+
+def find_track(video_id, source_path, **options):
+    """The stored track for a video if it was extracted the way this analysis would, else None."""
+    track = get_track(video_id)
+    if track is None or track["sampling"] != sampling_key(source_path, **options):
+        return None
+    return track
+
+
+def _classify_track(track, model_name, version=None):
+    from services.model_registry import current_version, get_entry
+    from services.yoga_model import classify_frames, video_features, live_features
+
+    model = current_version(model_name)
+    if version and model is not None and model.version != version:
+        model = get_entry(model_name).version_of(version)
+    if model is None:
+        return None, None
+    landmarks, timestamps = load_track(track)
+    features = video_features(landmarks) if model_name == "svm" else live_features(landmarks)
+    labels, confidences = classify_frames(features, model.model)
+    return model, (labels, confidences, timestamps)
+
+
+def reclassify(track, model_name="svm"):
+    """
+    Classify a stored track with the active version of `model_name` ("svm" on x/y rows,
+    "rf" on x/y/visibility rows). Same result shape as process_video_batched.
+    """
+    from services.yoga_model import summarize_timeline, summary_failure
+
+    model, frames = _classify_track(track, model_name)
+    if model is None:
+        return summary_failure(f"{model_name.upper()} model not loaded")
+
+    result = summarize_timeline(*frames)
+    result["frames_sampled_every"] = track["frames_sampled_every"]
+    result["model_version"] = model.version
+    return result
+
+
+def frame_timeline(track, model_name="svm", version=None):
+    """
+    Per-frame {"time", "label", "confidence"} lists for a stored track, classified with
+    `version` of the model when given (so they match the stored result) or the active
+    one. None if that version is not loaded (any more).
+    """
+    model, frames = _classify_track(track, model_name, version)
+    if model is None:
+        return None
+    labels, confidences, timestamps = frames
+    return {
+        "model_version": model.version,
+        "time": [round(float(t), 3) for t in timestamps],
+        "label": [str(label) for label in labels],
+        "confidence": [None if np.isnan(c) else round(float(c), 4) for c in confidences],
+    }
+
+
+def remove_track_files(source_path):
+    """Delete the landmark files extracted from `source_path` (the row goes with its video)."""
+    for path in track_paths(source_path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
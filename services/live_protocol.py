@@ -0,0 +1,68 @@
+import numpy as np
+import cv2
+
+from services.instrumentation import span
+
+# Request bodies accepted by /predict_live:
+#   image/jpeg, image/png, image/webp, application/octet-stream -> raw encoded image bytes
+#   application/x-pose-keypoints -> 99 little-endian float32 values (33 x [x, y, visibility])
+#   application/json {"keypoints": [...]} -> same 99 values, flat or as 33 triples; pixel
+#                                            coordinates are accepted with "width"/"height"
+
+KEYPOINTS_CONTENT_TYPE = 'application/x-pose-keypoints'
+IMAGE_CONTENT_TYPES = ('application/octet-stream', 'image/jpeg', 'image/png', 'image/webp')
+
+LIVE_KEYPOINTS = 33
+LIVE_KEYPOINT_VALUES = LIVE_KEYPOINTS * 3
+
+# Anything bigger than this is not a single camera frame
+MAX_FRAME_BYTES = 4 * 1024 * 1024
+
+
+class LiveInputError(ValueError):
+    """Raised when a live request body cannot be turned into a frame or a landmark vector."""
+
+
+def decode_image_bytes(data):
+    """Decode raw encoded image bytes into a BGR frame."""
+    if not data:
+        raise LiveInputError("Empty image body")
+    if len(data) > MAX_FRAME_BYTES:
+        raise LiveInputError("Frame too large")
+
+    with span("decode"):
+        frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise LiveInputError("Could not decode image")
+    return frame
+
+
+def keypoints_from_bytes(data):
+    """Read a packed float32 keypoint body into a 99-value vector."""
+    if len(data) != LIVE_KEYPOINT_VALUES * 4:
+        raise LiveInputError(f"Expected {LIVE_KEYPOINT_VALUES} float32 values")
+    return np.frombuffer(data, dtype='<f4')
+
+
+def keypoints_from_json(payload):
+    """
+    Turn {"keypoints": [...], "width": w, "height": h} into a 99-value vector. Keypoints
+    may be flat or [x, y, visibility] triples; when width/height are given, x and y are
+    treated as pixels and normalized the way MediaPipe reports them.
+    """
+    try:
+        keypoints = np.asarray(payload.get("keypoints"), dtype=np.float32)
+    except (TypeError, ValueError):
+        raise LiveInputError("Keypoints must be numbers")
+
+    if keypoints.size != LIVE_KEYPOINT_VALUES:
+        raise LiveInputError(f"Expected {LIVE_KEYPOINTS} keypoints with x, y, visibility")
+    keypoints = keypoints.reshape(LIVE_KEYPOINTS, 3)
+
+    width, height = payload.get("width"), payload.get("height")
+    if width and height:
+        keypoints = keypoints.copy()
+        keypoints[:, 0] /= float(width)
+        keypoints[:, 1] /= float(height)
+
+    return keypoints.reshape(-1)
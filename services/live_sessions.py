@@ -0,0 +1,157 @@
+import threading
+import time
+import uuid
+
+import cv2
+import numpy as np
+
+from services.instrumentation import span
+
+# ========== Live Camera Sessions ==========
+
+# Each camera session leases its Pose tracker from the shared pool under its own id (so
+# tracking carries across frames without a graph per session) and keeps an exponential
+# moving average of the RF class probabilities, so the label shown to the user only
+# changes when the pose actually changes instead of flickering frame to frame.
+
+SMOOTHING_ALPHA = 0.35        # weight of the newest frame in the EMA
+SESSION_IDLE_TIMEOUT = 120.0  # seconds without a frame before a session is closed
+MAX_LIVE_SESSIONS = 32
+
+
+class LiveSessionLimit(Exception):
+    """Raised when the maximum number of live sessions are open."""
+
+
+class LiveSession:
+    def __init__(self, session_id, alpha=SMOOTHING_ALPHA):
+        self.id = session_id
+        self.alpha = alpha
+        self.smoothed = None
+        self.last_seq = -1
+        self.last_seen = time.monotonic()
+        self.frames_processed = 0
+        self.frames_dropped = 0
+        self._busy = threading.Lock()
+        # Reused for every frame; only touched while _busy is held
+        self._landmarks = np.empty(33 * 3, dtype=np.float32)
+
+    def _accept(self, seq):
+        """Claim the session for one frame, or return False if the frame is stale."""
+        self.last_seen = time.monotonic()
+        if seq is not None and seq <= self.last_seq:
+            self.frames_dropped += 1
+            return False
+        # A frame is still being processed: the client is ahead of us, drop this one
+        if not self._busy.acquire(blocking=False):
+            self.frames_dropped += 1
+            return False
+        if seq is not None:
+            self.last_seq = seq
+        return True
+
+    def process_frame(self, frame, seq=None):
+        """Run this session's tracker on a BGR frame. Returns None if the frame was dropped."""
+        from services.yoga_model import extract_landmarks, leased_pose, LIVE_LEASE_TIMEOUT
+
+        if not self._accept(seq):
+            return None
+        try:
+            with span("color_convert"):
+                image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with leased_pose(self.id, timeout=LIVE_LEASE_TIMEOUT) as pose:
+                with span("pose"):
+                    results = pose.process(image_rgb)
+                landmarks = extract_landmarks(results, mode="live", out=self._landmarks)
+            return self._classify(landmarks)
+        finally:
+            self._busy.release()
+
+    def process_landmarks(self, landmarks, seq=None):
+        """Classify client-side landmarks. Returns None if the frame was dropped."""
+        if not self._accept(seq):
+            return None
+        try:
+            return self._classify(landmarks)
+        finally:
+            self._busy.release()
+
+    def _classify(self, landmarks):
+        from services import yoga_model
+
+        rf_classifier = yoga_model.get_rf_classifier()
+        if rf_classifier is None:
+            return yoga_model.summary_failure("Random Forest model not loaded")
+        if landmarks is None or len(landmarks) != yoga_model.LANDMARK_VALUES_LIVE:
+            return yoga_model.summary_failure("No pose detected in frame")
+
+        probas = np.asarray(yoga_model.predict_live_proba(landmarks), dtype=np.float64)
+        if self.smoothed is None or self.smoothed.shape != probas.shape:
+            self.smoothed = probas
+        else:
+            self.smoothed = self.alpha * probas + (1 - self.alpha) * self.smoothed
+        self.frames_processed += 1
+
+        best = int(np.argmax(self.smoothed))
+        label = rf_classifier.classes_[best]
+        confidence = round(float(self.smoothed[best]) * 100, 2)
+        return {
+            "label": str(label),
+            "score": confidence,
+            "verdict": "✅ Live pose detected!" if confidence >= 60 else "❌ Low confidence in prediction",
+            "feedback": yoga_model.FEEDBACK.get(str(label).lower(), "👍 Good attempt!")
+        }
+
+    def close(self):
+        from services.pose_pool import get_pose_pool
+        get_pose_pool().forget(self.id)
+
+
+class LiveSessionManager:
+    """Process-wide registry of open live sessions with idle eviction."""
+
+    def __init__(self, max_sessions=MAX_LIVE_SESSIONS, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def open(self):
+        self.evict_idle()
+        with self._lock:
+            if len(self._sessions) >= self.max_sessions:
+                raise LiveSessionLimit("Too many live sessions, try again shortly.")
+            session = LiveSession(uuid.uuid4().hex)
+            self._sessions[session.id] = session
+            return session
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def close(self, session_id):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [s for s in self._sessions.values() if s.last_seen < cutoff]
+            for session in idle:
+                del self._sessions[session.id]
+        for session in idle:
+            session.close()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_live_sessions():
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = LiveSessionManager()
+        return _manager
@@ -0,0 +1,63 @@
+import os
+import threading
+
+from flask import abort, send_file
+from werkzeug.security import safe_join
+
+from db_services import get_content_hash_by_url
+from services.hashing import hash_file
+
+# Uploaded videos are served with a strong ETag (their SHA-256 content hash), so a
+# revisit costs a 304 instead of the whole file, and with byte-range support so the
+# player can seek without downloading everything before that point. A file whose name
+# is its content hash can never change, so it is cached for a year without revalidation.
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+_hashes = {}  # absolute path -> (size, mtime_ns, content hash)
+_hashes_lock = threading.Lock()
+
+
+def is_content_addressed(filename, content_hash):
+    """True when the file name (without extension) is its own content hash."""
+    return os.path.basename(filename).split('.', 1)[0] == content_hash
+
+
+def content_hash_for(path, url):
+    """
+    The SHA-256 of the file at `path`: the one recorded at upload for `url` when there
+    is one, otherwise computed once. Remembered per process until the file changes.
+    """
+    stat = os.stat(path)
+    with _hashes_lock:
+        known = _hashes.get(path)
+    if known is not None and known[:2] == (stat.st_size, stat.st_mtime_ns):
+        return known[2]
+
+    content_hash = get_content_hash_by_url(url) or hash_file(path)
+    with _hashes_lock:
+        _hashes[path] = (stat.st_size, stat.st_mtime_ns, content_hash)
+    return content_hash
+
+
+def send_media(root_path, directory, filename):
+    """
+    Send `directory/filename` (directory relative to `root_path`) with Range,
+    If-None-Match, If-Modified-Since and If-Range handled by send_file.
+    """
+    path = safe_join(os.path.join(root_path, directory), filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    url = os.path.join(directory, filename).replace("\\", "/")
+    content_hash = content_hash_for(path, url)
+    immutable = is_content_addressed(filename, content_hash)
+
+    # max_age=0 still lets the browser keep the file, but it revalidates with the ETag
+    response = send_file(path, conditional=True, etag=content_hash,
+                         max_age=IMMUTABLE_MAX_AGE if immutable else 0)
+    response.cache_control.public = None
+    response.cache_control.private = True
+    if immutable:
+        response.cache_control.immutable = True
+    return response
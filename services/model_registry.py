@@ -0,0 +1,252 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# ========== Lazy Model Registry ==========
+
+# Classifiers are registered with a file and a loader and only loaded the first time
+# something asks for them, so importing the app (and serving routes that never touch ML)
+# stays cheap. Every load and other startup step is timed; warm_up() can preload in the
+# background. Each model is versioned by file contents and can be swapped at runtime.
+
+# Registered but unused models (kept for A/B runs) are not preloaded
+WARM_UP_MODELS = ("svm", "rf")
+
+RELOAD_CHECK_INTERVAL = float(os.environ.get('MODEL_RELOAD_CHECK_INTERVAL', 5.0))
+MAX_KEPT_VERSIONS = 3
+
+_timings = {}
+_timings_lock = threading.Lock()
+
+
+@contextmanager
+def timed_stage(name):
+    """Record how long the `with` block took under `name` in the startup timings."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def record_stage(name, seconds):
+    with _timings_lock:
+        _timings[name] = round(seconds, 4)
+
+
+def startup_timings():
+    with _timings_lock:
+        return dict(_timings)
+
+
+class ModelVersion:
+    """One loaded model file. `version` is derived from the file contents."""
+
+    __slots__ = ("name", "version", "model", "path", "loaded_at")
+
+    def __init__(self, name, version, model, path):
+        self.name = name
+        self.version = version
+        self.model = model
+        self.path = path
+        self.loaded_at = time.time()
+
+    def describe(self):
+        return {"version": self.version, "path": self.path, "loaded_at": self.loaded_at}
+
+
+class VersionedModel:
+    """
+    A named model loaded lazily from `path`. New versions are loaded off to the side and
+    swapped in with a single reference assignment, so callers that already hold a
+    ModelVersion finish their inference on it while new calls see the new one. The model
+    file is also watched: replacing it on disk reloads it in the background.
+    """
+
+    def __init__(self, name, path, loader, check_interval=RELOAD_CHECK_INTERVAL):
+        self.name = name
+        self.path = path
+        self.check_interval = check_interval
+        self._loader = loader
+        self._active = None
+        self._versions = OrderedDict()
+        self._attempted = False
+        self._load_lock = threading.Lock()  # serializes loads; readers never take it
+        self._file_key = None
+        self._failed_key = None  # file that last failed to load; not retried until it changes
+        self._next_check = 0.0
+
+    @property
+    def loaded(self):
+        return self._active is not None
+
+    def _file_stat(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    def _load(self, path):
+        from services.hashing import hash_file
+
+        file_key = self._file_stat(path)
+        version = hash_file(path)[:12]
+        if version in self._versions:
+            loaded = self._versions[version]
+        else:
+            try:
+                model = self._loader(path)
+            except Exception:
+                if path == self.path:
+                    self._failed_key = file_key
+                raise
+            loaded = ModelVersion(self.name, version, model, path)
+            self._versions[version] = loaded
+            while len(self._versions) > MAX_KEPT_VERSIONS:
+                self._versions.popitem(last=False)
+        self.path = path
+        self._file_key = file_key
+        self._active = loaded
+        return loaded
+
+    def current(self):
+        """The active ModelVersion (loaded on first use), or None if it could not be loaded."""
+        if not self._attempted:
+            with self._load_lock:
+                if not self._attempted:
+                    with timed_stage(f"load:{self.name}"):
+                        try:
+                            self._load(self.path)
+                        except Exception as e:
+                            log.error("Failed to load %s model: %s", self.name, e)
+                    self._attempted = True
+        else:
+            self._check_for_update()
+        return self._active
+
+    def get(self):
+        active = self.current()
+        return active.model if active is not None else None
+
+    def reload(self, path=None):
+        """Load `path` (default: the current file) and make it the active version."""
+        with self._load_lock:
+            with timed_stage(f"reload:{self.name}"):
+                loaded = self._load(path or self.path)
+            self._attempted = True
+        log.info("%s model now at version %s", self.name, loaded.version)
+        return loaded
+
+    def activate(self, version):
+        """Switch back to an already loaded version (e.g. to roll back)."""
+        with self._load_lock:
+            if version not in self._versions:
+                raise KeyError(f"{self.name} version {version} is not loaded")
+            self._active = self._versions[version]
+        return self._active
+
+    def version_of(self, version):
+        return self._versions.get(version)
+
+    def describe(self):
+        active = self._active
+        return {
+            "active": active.describe() if active is not None else None,
+            "versions": [v.describe() for v in list(self._versions.values())],
+        }
+
+    def _check_for_update(self):
+        now = time.monotonic()
+        if not self.check_interval or now < self._next_check:
+            return
+        self._next_check = now + self.check_interval
+        file_key = self._file_stat(self.path)
+        if file_key is None or file_key in (self._file_key, self._failed_key):
+            return
+        threading.Thread(target=self._background_reload, name=f"reload-{self.name}", daemon=True).start()
+
+    def _background_reload(self):
+        if not self._load_lock.acquire(blocking=False):
+            return  # a reload is already running
+        try:
+            with timed_stage(f"reload:{self.name}"):
+                loaded = self._load(self.path)
+            log.info("%s model file changed, now at version %s", self.name, loaded.version)
+        except Exception as e:
+            log.error("Failed to reload %s model: %s", self.name, e)
+        finally:
+            self._load_lock.release()
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def register_model(name, path, loader):
+    """Register a model file under `name`. Nothing is loaded until it is first used."""
+    with _models_lock:
+        if name not in _models:
+            _models[name] = VersionedModel(name, path, loader)
+        return _models[name]
+
+
+def get_entry(name):
+    with _models_lock:
+        entry = _models.get(name)
+    if entry is None:
+        raise KeyError(f"Unknown model: {name}")
+    return entry
+
+
+def get_model(name):
+    return get_entry(name).get()
+
+
+def current_version(name):
+    """The active ModelVersion for `name` (model and version read together), or None."""
+    return get_entry(name).current()
+
+
+def reload_model(name, path=None):
+    return get_entry(name).reload(path)
+
+
+def loaded_models():
+    with _models_lock:
+        return {name: entry.loaded for name, entry in _models.items()}
+
+
+def describe_models():
+    with _models_lock:
+        entries = dict(_models)
+    return {name: entry.describe() for name, entry in entries.items()}
+
+
+def warm_up(extra=None, background=True):
+    """
+    Load the models in WARM_UP_MODELS (and run `extra`, e.g. building a Pose graph) ahead of
+    the first request. With background=True this runs on a daemon thread and returns it.
+    """
+    def run():
+        with timed_stage("warm_up"):
+            with _models_lock:
+                entries = list(_models.values())
+            for entry in entries:
+                if entry.name in WARM_UP_MODELS:
+                    entry.get()
+            if extra is not None:
+                with timed_stage("warm_up:extra"):
+                    extra()
+
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
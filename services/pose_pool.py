@@ -0,0 +1,187 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# ========== Pose Estimator Pool ==========
+
+# MediaPipe Pose objects are not thread-safe and carry tracking state between calls, but
+# building one costs a new graph. The pool hands out estimators one caller at a time.
+# A lease can carry a key (a live session id): the same key gets the same estimator
+# back while it is still pooled, so tracking continues across that session's frames.
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_IDLE_TIMEOUT = 300.0  # seconds an unused estimator is kept before it is closed
+
+
+# Key of an estimator whose session ended: matches no caller, so the next lease resets it
+_FORGOTTEN = object()
+
+
+class PoseEstimatorPoolExhausted(Exception):
+    """Raised when no estimator became free within the lease timeout."""
+
+
+class _Entry:
+    __slots__ = ("estimator", "key", "in_use", "last_used")
+
+    def __init__(self, estimator, key):
+        self.estimator = estimator
+        self.key = key
+        self.in_use = True
+        self.last_used = time.monotonic()
+
+
+class PoseEstimatorPool:
+    """Bounded, lazily filled pool of Pose estimators with idle eviction."""
+
+    def __init__(self, factory, max_size=DEFAULT_POOL_SIZE, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self._factory = factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._entries = []
+        self._creating = 0
+        self._cond = threading.Condition()
+        self._stats = {"leases": 0, "created": 0, "evicted": 0, "waits": 0, "timeouts": 0,
+                       "wait_seconds_total": 0.0, "wait_seconds_max": 0.0}
+
+    def _evict_idle(self, now):
+        cutoff = now - self.idle_timeout
+        idle = [e for e in self._entries if not e.in_use and e.last_used < cutoff]
+        for entry in idle:
+            self._entries.remove(entry)
+            self._stats["evicted"] += 1
+        return idle
+
+    def _claim(self, key, can_create):
+        """
+        Take a free entry for `key`. Returns (entry, busy): entry is None when nothing is
+        free (or a new estimator should be built instead of taking another session's),
+        and busy is True when this key's own estimator is in use (wait for it rather than
+        building a second one). Caller holds the lock.
+        """
+        if key is not None:
+            keyed = next((e for e in self._entries if e.key == key), None)
+            if keyed is not None:
+                if keyed.in_use:
+                    return None, True  # same session already has a frame in flight
+                keyed.in_use = True
+                return keyed, False
+
+        free = [e for e in self._entries if not e.in_use]
+        if not free:
+            return None, False
+        # Prefer estimators no session is tracking with, then a new one while there is
+        # room, and only then take the least recently used session's estimator
+        entry = min(free, key=lambda e: (e.key is not None and e.key is not _FORGOTTEN, e.last_used))
+        if entry.key is not None and entry.key is not _FORGOTTEN and can_create:
+            return None, False
+        # Anonymous leases always start from a clean tracker
+        if key is None or entry.key != key:
+            entry.estimator.reset()
+            entry.key = key
+        entry.in_use = True
+        return entry, False
+
+    @contextmanager
+    def lease(self, key=None, timeout=None):
+        """Borrow an estimator for the duration of the `with` block."""
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        waited = False
+        create = False
+        to_close = []
+
+        with self._cond:
+            while True:
+                to_close += self._evict_idle(time.monotonic())
+                can_create = len(self._entries) + self._creating < self.max_size
+                entry, busy = self._claim(key, can_create)
+                if entry is not None:
+                    break
+                if not busy and can_create:
+                    self._creating += 1
+                    create = True
+                    break
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoseEstimatorPoolExhausted("No pose estimator available")
+                waited = True
+                self._cond.wait(remaining)
+
+            self._stats["leases"] += 1
+            if waited:
+                wait = time.monotonic() - started
+                self._stats["waits"] += 1
+                self._stats["wait_seconds_total"] += wait
+                self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], wait)
+
+        for old in to_close:
+            old.estimator.close()
+
+        if create:
+            # Graph construction is slow, keep it outside the lock
+            try:
+                entry = _Entry(self._factory(), key)
+            except Exception:
+                with self._cond:
+                    self._creating -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._creating -= 1
+                self._entries.append(entry)
+                self._stats["created"] += 1
+
+        try:
+            yield entry.estimator
+        finally:
+            with self._cond:
+                entry.in_use = False
+                entry.last_used = time.monotonic()
+                self._cond.notify()
+
+    def forget(self, key):
+        """Drop a session's affinity; its estimator is reset before anyone else uses it."""
+        with self._cond:
+            for entry in self._entries:
+                if entry.key == key:
+                    entry.key = _FORGOTTEN
+
+    def stats(self):
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot["size"] = len(self._entries)
+            snapshot["in_use"] = sum(1 for e in self._entries if e.in_use)
+            snapshot["max_size"] = self.max_size
+        snapshot["wait_seconds_avg"] = (
+            round(snapshot["wait_seconds_total"] / snapshot["waits"], 6) if snapshot["waits"] else 0.0
+        )
+        return snapshot
+
+    def close(self):
+        with self._cond:
+            entries, self._entries = self._entries, []
+        for entry in entries:
+            entry.estimator.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pose_pool():
+    """Return the process-wide estimator pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from services.yoga_model import create_pose_estimator
+
+            _pool = PoseEstimatorPool(
+                create_pose_estimator,
+                max_size=int(os.environ.get('POSE_POOL_SIZE', DEFAULT_POOL_SIZE)),
+                idle_timeout=float(os.environ.get('POSE_POOL_IDLE_TIMEOUT', DEFAULT_IDLE_TIMEOUT))
+            )
+        return _pool
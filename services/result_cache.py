@@ -0,0 +1,64 @@
+import json
+import threading
+
+from db_services import get_cached_analysis, save_cached_analysis
+
+# Persistent analysis results keyed by (video content hash, model fingerprint). The
+# fingerprint covers the active SVM version (a hash of its file), the MediaPipe settings
+# and the sampling options, so a model swap or a settings change misses old entries.
+
+_stats = {"hits": 0, "misses": 0, "stores": 0}
+_stats_lock = threading.Lock()
+
+
+def model_fingerprint(stride=1, target_fps=None, version=None, early_exit_z=None):
+    """Fingerprint for the given (default: active) SVM version and sampling options."""
+    from services.yoga_model import POSE_SETTINGS
+    from services.model_registry import current_version
+
+    if version is None:
+        svm = current_version("svm")
+        version = svm.version if svm is not None else "missing"
+    settings = {"pose": POSE_SETTINGS, "stride": stride, "target_fps": target_fps}
+    if early_exit_z:
+        # Only present when set, so full-pass entries keep their existing keys
+        settings["early_exit_z"] = early_exit_z
+    settings = json.dumps(settings, sort_keys=True)
+    return f"{version}:{settings}"
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def lookup(content_hash, **options):
+    """Return the cached analysis result dict, or None on a miss."""
+    if not content_hash:
+        _count("misses")
+        return None
+
+    cached = get_cached_analysis(content_hash, model_fingerprint(**options))
+    if cached is None:
+        _count("misses")
+        return None
+
+    _count("hits")
+    return json.loads(cached)
+
+
+def store(content_hash, result, **options):
+    if not content_hash:
+        return
+    # Key by the version that produced the result, even if a reload happened meanwhile
+    fingerprint = model_fingerprint(version=result.get("model_version"), **options)
+    save_cached_analysis(content_hash, fingerprint, json.dumps(result, default=str))
+    _count("stores")
+
+
+def stats():
+    with _stats_lock:
+        snapshot = dict(_stats)
+    lookups = snapshot["hits"] + snapshot["misses"]
+    snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 4) if lookups else None
+    return snapshot
@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from db_services import get_prediction_by_id, get_video_by_id, get_prediction_segments
+from services.video_storage import media_name
+
+# Read-through cache of result page payloads (the template context of view_result),
+# keyed by prediction id. A result only changes when its video is re-analyzed or
+# deleted; those paths call invalidate() / invalidate_video(). The TTL bounds how stale
+# an entry can get in a process that did not see the write (e.g. another worker).
+
+MAX_ENTRIES = int(os.environ.get('RESULT_PAGE_CACHE_SIZE', 512))
+TTL_SECONDS = float(os.environ.get('RESULT_PAGE_CACHE_TTL', 300))
+
+_entries = OrderedDict()  # prediction id -> (expires_at, payload), least recently used first
+# Bumped by every invalidation. A build that started before one is not cached, since it
+# may have read the rows before the write that invalidated them.
+_generation = 0
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+
+def _build(prediction_id):
+    prediction = get_prediction_by_id(prediction_id)
+    if not prediction:
+        return None
+    video = get_video_by_id(prediction["video_id"])
+    if not video:
+        return None
+
+    return {
+        "user_id": prediction["user_id"],
+        "video_id": video["id"],
+        "prediction": {
+            "pose_name": prediction["pose_name"],
+            "score": prediction["score"],
+            "confidence": prediction["confidence"],
+            "is_correct": bool(prediction["is_correct"]),
+            "verdict": prediction["verdict"],
+            "feedback": prediction.get("feedback") or [],
+            "video_url": media_name(video["url"]),
+            "media_type": 'video',
+            "model_version": prediction["model_version"] or None,
+        },
+        "video": {
+            "id": video["id"],
+            "fileName": video["fileName"],
+            "url": video["url"],
+        },
+        "segments": get_prediction_segments(prediction_id),
+    }
+
+
+def get_result_page(prediction_id):
+    """
+    The payload for a result page: {"user_id", "video_id", "prediction", "video",
+    "segments"}, or None if the prediction or its video no longer exists. Callers must
+    check user_id themselves; the cache is shared by all users.
+    """
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get(prediction_id)
+        if entry is not None:
+            if entry[0] > now:
+                _entries.move_to_end(prediction_id)
+                _stats["hits"] += 1
+                return entry[1]
+            del _entries[prediction_id]
+            _stats["expired"] += 1
+        _stats["misses"] += 1
+        generation = _generation
+
+    payload = _build(prediction_id)
+    if payload is None or MAX_ENTRIES <= 0:
+        return payload
+
+    with _lock:
+        if _generation != generation:
+            return payload
+        _entries[prediction_id] = (now + TTL_SECONDS, payload)
+        _entries.move_to_end(prediction_id)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+            _stats["evictions"] += 1
+    return payload
+
+
+def invalidate(prediction_id):
+    global _generation
+    with _lock:
+        _generation += 1
+        if _entries.pop(prediction_id, None) is not None:
+            _stats["invalidations"] += 1
+
+
+def invalidate_video(video_id):
+    """Drop every cached result of a video (one per model version)."""
+    global _generation
+    with _lock:
+        _generation += 1
+        stale = [key for key, (_, payload) in _entries.items() if payload["video_id"] == video_id]
+        for key in stale:
+            del _entries[key]
+        _stats["invalidations"] += len(stale)
+
+
+def stats():
+    with _lock:
+        snapshot = dict(_stats)
+        snapshot["entries"] = len(_entries)
+    lookups = snapshot["hits"] + snapshot["misses"]
+    snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 4) if lookups else None
+    snapshot["max_entries"] = MAX_ENTRIES
+    snapshot["ttl_seconds"] = TTL_SECONDS
+    return snapshot
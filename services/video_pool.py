@@ -0,0 +1,170 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import threading
+
+import cv2
+
+# ========== Worker Process State ==========
+
+# Each worker process owns its own Pose tracker and model registry, created once in the
+# initializer. Nothing here is shared with the parent or with other workers. The
+# registry in each worker notices a replaced model file and reloads it on its own.
+_worker_pose = None
+
+
+def _init_worker():
+    global _worker_pose
+    from services import yoga_model
+
+    _worker_pose = yoga_model.create_pose_estimator()
+    yoga_model.get_svm_classifier()
+
+
+def _analyze_segment(video_path, start_frame, end_frame, stride, model_version=None, keep_landmarks=False,
+                     early_exit_z=None):
+    """
+    Runs inside a worker: returns (labels, confidences, frame indices, model version,
+    landmarks, frames decoded, stopped early) for the frames with a pose.
+    `model_version` pins the SVM version chosen by the parent when this worker still has
+    it loaded. landmarks is only returned when `keep_landmarks` is set, otherwise None.
+    With `early_exit_z` the segment stops once its own vote has converged.
+    """
+    from services.yoga_model import (
+        collect_video_landmarks, classify_frames, video_features, vote_monitor, EARLY_EXIT_CHECK_EVERY
+    )
+    from services.model_registry import get_entry
+
+    entry = get_entry("svm")
+    svm = (model_version and entry.version_of(model_version)) or entry.current()
+    if svm is None:
+        raise RuntimeError("SVM model not loaded in worker")
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Invalid video path: {video_path}")
+
+    # Tracking state must not leak from the previous segment / video
+    _worker_pose.reset()
+    monitor = vote_monitor(svm.model, early_exit_z) if early_exit_z else None
+    try:
+        landmarks, frame_indices, frames_decoded = collect_video_landmarks(
+            cap, _worker_pose, stride=stride, start_frame=start_frame, end_frame=end_frame,
+            stop_check=monitor, check_every=EARLY_EXIT_CHECK_EVERY
+        )
+    finally:
+        cap.release()
+
+    labels, confidences = classify_frames(video_features(landmarks), svm.model)
+    kept = landmarks if keep_landmarks else None
+    return labels, confidences, frame_indices, svm.version, kept, frames_decoded, bool(monitor and monitor.converged)
+
+
+# ========== Pool Management ==========
+
+_pool = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+# Segments shorter than this are not worth shipping to another process
+MIN_SEGMENT_FRAMES = 150
+
+
+def get_video_pool(max_workers=None):
+    """Return the shared process pool, creating it on first use."""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None:
+            workers = max_workers or int(os.environ.get('VIDEO_POOL_WORKERS', 0)) or os.cpu_count() or 1
+            _pool_size = workers
+            # spawn: MediaPipe graphs are not fork-safe
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return _pool
+
+
+def shutdown_video_pool(wait=True):
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait)
+            _pool = None
+
+
+def split_segments(total_frames, segments, stride=1):
+    """Split [0, total_frames) into up to `segments` ranges aligned to the sampling stride."""
+    if total_frames <= 0:
+        return [(0, None)]
+
+    segments = max(1, min(segments, total_frames // MIN_SEGMENT_FRAMES or 1))
+    size = -(-total_frames // segments)
+    size = -(-size // stride) * stride  # keep every segment start on a sampled frame
+
+    return [(start, min(start + size, total_frames)) for start in range(0, total_frames, size)]
+
+
+def analyze_video_parallel(video_path, segments=None, stride=1, target_fps=None, progress=None,
+                           keep_landmarks=False, early_exit_z=None):
+    """
+    Analyze a video on the process pool. The video is split into time segments, each
+    segment is classified in a separate worker and the per-frame labels are joined in
+    frame order for a single majority vote and timeline (same result shape as
+    process_video_batched). `progress(frames_done, frames_total)` is called as segments
+    finish. keep_landmarks works as in process_video_batched. With early_exit_z each
+    segment stops on its own once its vote converges, so the vote is taken over the
+    start of every segment rather than over one prefix of the video.
+    """
+    import numpy as np
+    from services.yoga_model import (
+        sampling_stride, summary_failure, summarize_timeline, frame_timestamps
+    )
+    from services.model_registry import current_version
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return summary_failure("Invalid video path")
+    step = sampling_stride(cap, stride, target_fps)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    native_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+    cap.release()
+
+    svm = current_version("svm")
+    pinned = svm.version if svm is not None else None
+
+    pool = get_video_pool()
+    ranges = split_segments(total_frames, segments or _pool_size, step)
+    futures = [
+        pool.submit(_analyze_segment, video_path, start, end, step, pinned, keep_landmarks, early_exit_z)
+        for start, end in ranges
+    ]
+
+    parts = []
+    versions = set()
+    frames_done = 0
+    frames_decoded = 0
+    stopped_early = False
+    for (start, end), future in zip(ranges, futures):
+        labels, confidences, frame_indices, version, landmarks, decoded, stopped = future.result()
+        parts.append((labels, confidences, frame_indices, landmarks))
+        versions.add(version)
+        frames_decoded += decoded
+        stopped_early = stopped_early or stopped
+        if progress is not None and end is not None:
+            frames_done += end - start
+            progress(frames_done, total_frames)
+
+    timestamps = frame_timestamps(np.concatenate([part[2] for part in parts]), native_fps)
+    result = summarize_timeline(
+        np.concatenate([part[0] for part in parts]), np.concatenate([part[1] for part in parts]), timestamps
+    )
+    result["frames_sampled_every"] = step
+    result["frames_processed"] = frames_decoded
+    result["stopped_early"] = stopped_early
+    # Segments only disagree if a worker could not load the parent's version
+    result["model_version"] = pinned if versions == {pinned} else ",".join(sorted(versions))
+    if keep_landmarks:
+        result["landmarks"] = (np.concatenate([part[3] for part in parts]), timestamps)
+    return result
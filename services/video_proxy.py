@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+log = logging.getLogger(__name__)
+
+# ========== Analysis Proxies ==========
+
+# Phone uploads are often 1080p60, while MediaPipe Pose works on a small input. After an
+# upload is saved we transcode, in the background, a downscaled, reduced-fps copy (the
+# "proxy") next to it. Analysis reads the proxy when it exists, so most of the decode
+# and resize work has already been paid for off the interactive path.
+
+PROXY_DIR = '.proxy'
+PROXY_MAX_HEIGHT = 480
+PROXY_MAX_FPS = 15.0
+PROXY_FOURCC = 'mp4v'
+# Bump when the proxy settings change so cached results from older proxies are not reused
+PROXY_VERSION = 1
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def proxy_path_for(video_path):
+    folder, name = os.path.split(video_path)
+    return os.path.join(folder, PROXY_DIR, f"{os.path.splitext(name)[0]}.proxy.mp4")
+
+
+def analysis_source(video_path):
+    """The proxy for `video_path` if a finished one exists, otherwise the original."""
+    proxy = proxy_path_for(video_path)
+    try:
+        if os.path.getmtime(proxy) >= os.path.getmtime(video_path):
+            return proxy
+    except OSError:
+        pass
+    return video_path
+
+
+def build_proxy(video_path, max_height=PROXY_MAX_HEIGHT, max_fps=PROXY_MAX_FPS):
+    """
+    Transcode `video_path` into its proxy with OpenCV. Returns the proxy path, or None.
+    An up-to-date proxy (e.g. of an earlier upload of the same bytes) is kept as it is.
+    """
+    if analysis_source(video_path) != video_path:
+        return proxy_path_for(video_path)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+
+    native_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH) or 0)
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT) or 0)
+    if native_fps <= 0 or width <= 0 or height <= 0:
+        cap.release()
+        return None
+
+    step = max(1, int(round(native_fps / max_fps)))
+    scale = min(1.0, max_height / float(height))
+    size = (max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2))
+
+    proxy = proxy_path_for(video_path)
+    os.makedirs(os.path.dirname(proxy), exist_ok=True)
+    tmp_path = f"{proxy}.tmp.mp4"
+    writer = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*PROXY_FOURCC), native_fps / step, size)
+    if not writer.isOpened():
+        cap.release()
+        return None
+
+    frame_index = 0
+    written = 0
+    try:
+        while True:
+            if frame_index % step:
+                if not cap.grab():
+                    break
+                frame_index += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_index += 1
+            if scale < 1.0:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            writer.write(frame)
+            written += 1
+    finally:
+        cap.release()
+        writer.release()
+
+    if not written:
+        os.remove(tmp_path)
+        return None
+    os.replace(tmp_path, proxy)
+    return proxy
+
+
+def _build_in_background(video_path):
+    try:
+        proxy = build_proxy(video_path)
+        if proxy:
+            log.info("Analysis proxy ready: %s", proxy)
+    except Exception:
+        log.exception("Could not build analysis proxy for %s", video_path)
+    finally:
+        with _pending_lock:
+            _pending.discard(video_path)
+
+
+def schedule_proxy(video_path):
+    """Queue a proxy transcode for a freshly saved upload (one at a time per process)."""
+    global _executor
+    if analysis_source(video_path) != video_path:
+        return  # deduplicated upload whose proxy already exists
+    with _pending_lock:
+        if video_path in _pending:
+            return
+        _pending.add(video_path)
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="proxy")
+    _executor.submit(_build_in_background, video_path)
+
+
+def remove_proxy(video_path):
+    try:
+        os.remove(proxy_path_for(video_path))
+    except OSError:
+        pass
@@ -0,0 +1,125 @@
+import os
+import uuid
+
+from db_services import save_video_ref, delete_video_by_id
+from services.hashing import save_and_hash
+
+# Uploaded videos are stored once per distinct content, named by their SHA-256 under
+# two levels of hash-prefix directories (static/videos/ab/cd/abcd....mp4), so no
+# directory grows past a few thousand entries even with millions of files. The
+# video_blobs table counts the videos rows pointing at each file; uploading the same
+# bytes again only adds a row, and the file is unlinked when the last row is deleted.
+
+URL_PREFIX = 'static/videos/'
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+INCOMING_DIR = '.incoming'
+
+# Worker processes coordinate through the database, not a lock: the last reference is
+# dropped and the file unlinked inside one write transaction, and an upload commits its
+# reference before looking at the file. Once an upload's row is counted nobody can
+# unlink the file, so if it is missing at that point the upload puts its copy in place.
+
+
+def blob_name(content_hash, ext):
+    """Path of the stored file relative to the upload folder, e.g. 'ab/cd/abcd….mp4'."""
+    shards = [content_hash[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH] for i in range(SHARD_LEVELS)]
+    return "/".join(shards + [f"{content_hash}{ext.lower()}"])
+
+
+def media_name(url):
+    """The name to pass to the uploads route for a videos.url."""
+    return url[len(URL_PREFIX):] if url.startswith(URL_PREFIX) else os.path.basename(url)
+
+
+def incoming_path(upload_folder):
+    """A fresh temporary path inside the upload folder (same filesystem, so moves are renames)."""
+    folder = os.path.join(upload_folder, INCOMING_DIR)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, f"{uuid.uuid4().hex}.part")
+
+
+def _place(temp_path, dest):
+    # prune() in another request may remove the shard directories between the two calls
+    for attempt in range(3):
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        try:
+            os.replace(temp_path, dest)
+            return
+        except FileNotFoundError:
+            if attempt == 2 or not os.path.exists(temp_path):
+                raise
+
+
+def store_file(temp_path, content_hash, upload_folder, user_id, filename):
+    """
+    Take a fully written file with a known content hash and record a video for it.
+    When the same bytes are already stored, the new file is discarded and the existing
+    one shared; if that file has gone missing, the new one takes its place under the
+    name every existing row points at. Returns (video id, path of the stored file).
+    """
+    ext = os.path.splitext(filename)[1] or '.webm'
+    size = os.path.getsize(temp_path)
+    try:
+        video_id, url = save_video_ref(filename, URL_PREFIX + blob_name(content_hash, ext), user_id,
+                                       content_hash, size)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+    dest = os.path.join(upload_folder, media_name(url))
+    if os.path.exists(dest):
+        os.remove(temp_path)
+    else:
+        _place(temp_path, dest)
+    return video_id, dest
+
+
+def store_stream(stream, upload_folder, user_id, filename):
+    """Hash a readable stream to disk and store it with store_file. Returns (video id, path)."""
+    temp_path = incoming_path(upload_folder)
+    try:
+        content_hash = save_and_hash(stream, temp_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return store_file(temp_path, content_hash, upload_folder, user_id, filename)
+
+
+def _unlinker(root_path):
+    def unlink(url):
+        try:
+            os.remove(os.path.join(root_path, url))
+        except OSError:
+            pass
+    return unlink
+
+
+def delete_video(video_id, root_path):
+    """
+    Delete a video row and drop its reference. The file is unlinked only when no other
+    video uses it. Returns the file's absolute path if it was unlinked, else None; the
+    caller then removes files derived from it and calls prune().
+    """
+    released = delete_video_by_id(video_id, unlink=_unlinker(root_path))
+    if released is None or not released["unreferenced"]:
+        return None
+    return os.path.join(root_path, released["url"])
+
+
+def prune(path):
+    """Remove the shard directories of an unlinked file (and empty ones inside them, e.g. .proxy/.landmarks)."""
+    folder = os.path.dirname(path)
+    for _ in range(SHARD_LEVELS):
+        # Files stored before sharding live directly in the upload folder
+        if len(os.path.basename(folder)) != SHARD_WIDTH:
+            return
+        try:
+            for parent, dirs, _ in os.walk(folder, topdown=False):
+                for name in dirs:
+                    os.rmdir(os.path.join(parent, name))
+            os.rmdir(folder)
+        except OSError:  # not empty
+            return
+        folder = os.path.dirname(folder)
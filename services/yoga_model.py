@@ -1,37 +1,65 @@
 import os
+import math
+import logging
+import threading
+from itertools import chain
 import cv2
 import numpy as np
 import pickle
 import joblib
-import mediapipe as mp
 from collections import Counter
 
+from services.model_registry import register_model, get_model, current_version
+from services.instrumentation import span
+
+log = logging.getLogger(__name__)
+
 # ========== Model Loading ==========
 
 MODEL_DIR = os.path.dirname(__file__)
 
-# Load SVM model for uploaded video
+# Models are loaded lazily on first use and can be hot-swapped (see services/model_registry.py)
 svm_model_path = os.path.join(MODEL_DIR, 'svm_asana_model.pkl')
-svm_classifier = None
-try:
-    svm_classifier = joblib.load(svm_model_path)
-    print(f"✅ SVM model loaded using joblib: {svm_model_path}")
-except Exception as e:
-    print(f"❌ Failed to load SVM model: {e}")
-
-# Load Random Forest model for live frame
 rf_model_path = os.path.join(MODEL_DIR, 'random_forest_model.joblib')
-rf_classifier = None
-try:
-    rf_classifier = joblib.load(rf_model_path)
-    print(f"✅ Random Forest model loaded: {rf_model_path}")
-except Exception as e:
-    print(f"❌ Failed to load Random Forest model: {e}")
+svm_pose_model_path = os.path.join(MODEL_DIR, 'svm_pose_classifier.pkl')
+label_encoder_path = os.path.join(MODEL_DIR, 'label_encoder.pkl')
+
+
+def _load_joblib(path):
+    model = joblib.load(path)
+    log.info("Model loaded using joblib: %s", path)
+    return model
+
+
+register_model("svm", svm_model_path, _load_joblib)    # uploaded video
+register_model("rf", rf_model_path, _load_joblib)      # live frame
+# Alternative pose classifier and its label encoder, available for A/B runs
+register_model("svm_pose", svm_pose_model_path, _load_joblib)
+register_model("label_encoder", label_encoder_path, _load_joblib)
+
+
+def get_svm_classifier():
+    return get_model("svm")
+
+
+def get_rf_classifier():
+    return get_model("rf")
 
 # ========== Mediapipe Setup ==========
 
-mp_pose = mp.solutions.pose
-pose = mp_pose.Pose(static_image_mode=False, min_detection_confidence=0.3, min_tracking_confidence=0.3)
+POSE_SETTINGS = {"static_image_mode": False, "min_detection_confidence": 0.3, "min_tracking_confidence": 0.3}
+
+
+def create_pose_estimator():
+    """Build a new, independent Pose tracker with the standard settings."""
+    import mediapipe as mp  # heavy import, deferred until a tracker is actually needed
+    return mp.solutions.pose.Pose(**POSE_SETTINGS)
+
+
+def leased_pose(session_key=None, timeout=None):
+    """Borrow a Pose tracker from the shared pool (keyed leases keep their tracking state)."""
+    from services.pose_pool import get_pose_pool
+    return get_pose_pool().lease(session_key, timeout=timeout)
 
 # ========== Feedback ==========
 
@@ -46,34 +74,60 @@ FEEDBACK = {
 
 # ========== Utilities ==========
 
-def extract_landmarks(results, mode="live"):
+def extract_landmarks(results, mode="live", out=None):
+    """
+    Flat float32 landmark vector: x, y, visibility per landmark for mode="live" (99
+    values) or x, y for mode="video" (66, the SVM layout). The values are streamed
+    straight into one array instead of building a list per landmark. With `out` (a
+    1-D float32 array of the right size, e.g. a row of a batch buffer) the vector is
+    written there and `out` is returned; None if no pose or a different landmark count.
+    """
     if not results.pose_landmarks:
         return None
+    points = results.pose_landmarks.landmark
     if mode == "live":
-        return np.array([[lm.x, lm.y, lm.visibility] for lm in results.pose_landmarks.landmark]).flatten()
+        values = chain.from_iterable((lm.x, lm.y, lm.visibility) for lm in points)
+        size = len(points) * 3
     else:  # for SVM model trained on 2D only
-        return np.array([[lm.x, lm.y] for lm in results.pose_landmarks.landmark]).flatten()
+        values = chain.from_iterable((lm.x, lm.y) for lm in points)
+        size = len(points) * 2
+
+    if out is None:
+        return np.fromiter(values, dtype=np.float32, count=size)
+    if out.size != size:
+        return None
+    out[:] = np.fromiter(values, dtype=np.float32, count=size)
+    return out
+
+
+_live_buffers = threading.local()
+
+
+def _live_buffer():
+    """Per-thread reusable 99-value buffer for single live frames."""
+    buffer = getattr(_live_buffers, "landmarks", None)
+    if buffer is None:
+        buffer = _live_buffers.landmarks = np.empty(LANDMARK_VALUES_LIVE, dtype=np.float32)
+    return buffer
 
 def display_summary(label, confidence, verdict, feedback_msg):
-    print("\n✅ Final Results:")
-    print(f"🎯 Predicted Asana: {label}")
-    print(f"📊 Confidence: {confidence}%")
-    print(f"{verdict}")
-    print(f"💬 Feedback: {feedback_msg}")
+    log.debug("Predicted %s (%s%%): %s %s", label, confidence, verdict, feedback_msg)
 
 def summary_failure(reason):
-    print(f"❌ {reason}")
+    log.debug("Analysis failed: %s", reason)
     return {"label": reason, "score": 0.0, "verdict": "", "feedback": ""}
 
 # ========== SVM Pose Prediction (Uploaded Video) ==========
 
 def predict_uploaded_pose(landmarks):
+    svm_classifier = get_svm_classifier()
     if svm_classifier is None:
         return None
-    return svm_classifier.predict([landmarks])[0]
+    with span("classify"):
+        return svm_classifier.predict(np.asarray(landmarks).reshape(1, -1))[0]
 
 def process_video(video_path):
-    if svm_classifier is None:
+    if get_svm_classifier() is None:
         return summary_failure("SVM model not loaded")
 
     cap = cv2.VideoCapture(video_path)
@@ -83,29 +137,27 @@ def process_video(video_path):
     predictions = []
     frame_count = 0
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame_count += 1
-        print(f"📸 Processing frame {frame_count}")
+    with leased_pose() as pose:
+        while cap.isOpened():
+            with span("decode"):
+                ret, frame = cap.read()
+            if not ret:
+                break
 
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = pose.process(image_rgb)
-        landmarks = extract_landmarks(results, mode="video")
+            frame_count += 1
 
-        if landmarks is not None:
-            print(f"✅ Landmarks detected ({len(landmarks)} values)")
-        else:
-            print("❌ No landmarks detected")
+            with span("color_convert"):
+                image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with span("pose"):
+                results = pose.process(image_rgb)
+            landmarks = extract_landmarks(results, mode="video")
 
-        if landmarks is not None and len(landmarks) == 66:
-            pred_class = predict_uploaded_pose(landmarks)
-            predictions.append(pred_class)
-            print(f"🎯 Frame {frame_count}: Predicted - {pred_class}")
-        else:
-            print(f"⚠️ Invalid landmarks in frame {frame_count}")
+            if landmarks is not None and len(landmarks) == 66:
+                pred_class = predict_uploaded_pose(landmarks)
+                predictions.append(pred_class)
+                log.debug("Frame %d: predicted %s", frame_count, pred_class)
+            else:
+                log.debug("Frame %d: no usable landmarks", frame_count)
 
     cap.release()
 
@@ -126,27 +178,376 @@ def process_video(video_path):
         "feedback": feedback_msg
     }
 
+# ========== Batched Video Pipeline ==========
+
+LANDMARK_VALUES_VIDEO = 66  # 33 landmarks x (x, y)
+LANDMARK_VALUES_LIVE = 99   # 33 landmarks x (x, y, visibility)
+LANDMARK_SHAPE = (33, 3)    # per frame: x, y, visibility
+
+
+def sampling_stride(cap, stride=1, target_fps=None):
+    """Return how many frames to advance per sample for the given stride / target fps."""
+    if target_fps:
+        native_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        if native_fps > 0:
+            return max(1, int(round(native_fps / float(target_fps))))
+    return max(1, int(stride or 1))
+
+
+PROGRESS_EVERY_FRAMES = 30
+# From this stride on, skipped frames are jumped over with a seek instead of grabbed one
+# by one; below it, decoding through is cheaper than seeking back to a keyframe
+SEEK_MIN_STRIDE = 8
+
+
+def collect_video_landmarks(cap, estimator, stride=1, start_frame=0, end_frame=None, progress=None,
+                            stop_check=None, check_every=None):
+    """
+    Decode every `stride`-th frame of an opened capture and run pose estimation on it.
+    Skipped frames are only grabbed (not decoded), or seeked past when the stride is at
+    least SEEK_MIN_STRIDE. `start_frame`/`end_frame` restrict the pass to a segment of
+    the video. `progress(frames_done, frames_total)` is called about every
+    PROGRESS_EVERY_FRAMES frames. If `stop_check(landmarks_so_far)` is given it is asked
+    every `check_every` found poses and the pass ends when it returns True.
+    Returns (landmarks, frame_indices, frames_decoded): a float32 (frames, 33, 3) array
+    of x, y, visibility for every frame where a pose was found, the index of each of
+    those frames in the video, and how many frames went through pose estimation.
+    """
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    if end_frame is None or (total_frames > 0 and end_frame > total_frames):
+        end_frame = total_frames if total_frames > 0 else None
+
+    frames_in_range = (end_frame - start_frame) if end_frame is not None else 0
+    capacity = max(1, -(-frames_in_range // stride)) if frames_in_range > 0 else 256
+    landmarks_out = np.empty((capacity,) + LANDMARK_SHAPE, dtype=np.float32)
+    frame_indices = np.empty(capacity, dtype=np.int32)
+    rows = 0
+    frames_decoded = 0
+
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    frame_index = start_frame
+    next_progress = start_frame
+    seek = stride >= SEEK_MIN_STRIDE
+
+    while end_frame is None or frame_index < end_frame:
+        if progress is not None and frame_index >= next_progress:
+            progress(frame_index - start_frame, frames_in_range)
+            next_progress = frame_index + PROGRESS_EVERY_FRAMES
+
+        if frame_index % stride:
+            if seek:
+                target = frame_index + stride - frame_index % stride
+                if end_frame is not None and target >= end_frame:
+                    break
+                if cap.set(cv2.CAP_PROP_POS_FRAMES, target):
+                    frame_index = target
+                    continue
+                seek = False  # backend cannot seek this file, fall back to grabbing
+            if not cap.grab():
+                break
+            frame_index += 1
+            continue
+
+        with span("decode"):
+            ret, frame = cap.read()
+        if not ret:
+            break
+        frame_index += 1
+        frames_decoded += 1
+
+        with span("color_convert"):
+            image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        with span("pose"):
+            results = estimator.process(image_rgb)
+        if rows == landmarks_out.shape[0]:
+            # Frame count from the container was wrong (common for webm), grow the buffers
+            landmarks_out = np.resize(landmarks_out, (rows * 2,) + LANDMARK_SHAPE)
+            frame_indices = np.resize(frame_indices, rows * 2)
+        # Written straight into the batch row; a frame without a pose leaves the row free
+        if extract_landmarks(results, mode="live", out=landmarks_out[rows].reshape(-1)) is None:
+            continue
+        frame_indices[rows] = frame_index - 1
+        rows += 1
+
+        if stop_check is not None and rows % check_every == 0 and stop_check(landmarks_out[:rows]):
+            break
+
+    if progress is not None:
+        progress(frame_index - start_frame, max(frames_in_range, frame_index - start_frame))
+    return landmarks_out[:rows], frame_indices[:rows], frames_decoded
+
+
+def video_features(landmarks):
+    """
+    (frames, 33, 3) landmarks -> (frames, 66) x/y rows in the layout the SVM was trained
+    on. Built directly as C-ordered float64, which is what libsvm takes, so the gather of
+    the x/y columns is the only copy before predict.
+    """
+    features = np.empty((landmarks.shape[0], LANDMARK_VALUES_VIDEO), dtype=np.float64)
+    features.reshape(landmarks.shape[0], LANDMARK_SHAPE[0], 2)[:] = landmarks[:, :, :2]
+    return features
+
+
+def live_features(landmarks):
+    """
+    (frames, 33, 3) landmarks -> (frames, 99) x/y/visibility rows for the RF model. A
+    view of the buffer: sklearn trees take float32 as is, so nothing is copied.
+    """
+    return landmarks.reshape(landmarks.shape[0], LANDMARK_VALUES_LIVE)
+
+
+def classify_landmark_matrix(matrix, classifier):
+    """Classify all landmark rows with a single vectorized predict call."""
+    if matrix.shape[0] == 0:
+        return []
+    with span("classify"):
+        return list(classifier.predict(matrix))
+
+
+def summarize_predictions(predictions):
+    """
+    Majority vote over per-frame predictions (a list, or an already merged Counter),
+    same result shape as process_video.
+    """
+    counts = predictions if isinstance(predictions, Counter) else Counter(predictions)
+    total = sum(counts.values())
+    if not total:
+        return summary_failure("No pose detected in video")
+
+    final_label, count = counts.most_common(1)[0]
+    confidence = round(count / total * 100, 2)
+    verdict = "✅ Pose performed correctly!" if confidence >= VERDICT_SCORE else "❌ Pose performed incorrectly!"
+    feedback_msg = FEEDBACK.get(str(final_label).lower(), "👍 Good attempt!")
+
+    return {
+        "label": final_label,
+        "score": confidence,
+        "verdict": verdict,
+        "feedback": feedback_msg
+    }
+
+
+# ========== Timeline ==========
+
+# A flow video holds several asanas, so besides the overall vote every pass yields a
+# per-frame sequence of labels and probabilities, grouped into segments. Runs shorter
+# than MIN_SEGMENT_SECONDS (transitions, single misclassified frames) are folded into
+# the segment before them.
+MIN_SEGMENT_SECONDS = 1.0
+
+
+def classify_frames(matrix, classifier):
+    """
+    Per-frame labels plus the classifier's probability for each label (NaN where the
+    classifier has no predict_proba). Labels are the same as classify_landmark_matrix.
+    """
+    if matrix.shape[0] == 0:
+        return np.empty(0, dtype=object), np.empty(0, dtype=np.float32)
+
+    with span("classify"):
+        labels = classifier.predict(matrix)
+        try:
+            proba = classifier.predict_proba(matrix)
+        except AttributeError:  # e.g. an SVC trained without probability=True
+            proba = None
+    confidences = np.full(len(labels), np.nan, dtype=np.float32)
+    if proba is not None:
+        column = {label: i for i, label in enumerate(classifier.classes_)}
+        confidences = proba[np.arange(len(labels)), [column[label] for label in labels]].astype(np.float32)
+    return labels, confidences
+
+
+def build_segments(labels, confidences, timestamps, min_duration=MIN_SEGMENT_SECONDS):
+    """
+    Group consecutive frames into [{"label", "start", "end", "frames", "confidence"}].
+    Times are seconds; a segment ends where the next one starts. `confidence` is the
+    mean probability of the segment's label over its frames (its share of the frames
+    when probabilities are missing), in percent.
+    """
+    count = len(labels)
+    if not count:
+        return []
+
+    def end_time(end):
+        return float(timestamps[end]) if end < count else float(timestamps[count - 1])
+
+    spans = []  # [start, end) frame ranges
+    start = 0
+    for i in range(1, count + 1):
+        if i < count and labels[i] == labels[start]:
+            continue
+        short = end_time(i) - float(timestamps[start]) < min_duration
+        if spans and short:
+            spans[-1][1] = i
+        else:
+            spans.append([start, i])
+        start = i
+    if len(spans) > 1 and end_time(spans[0][1]) - float(timestamps[0]) < min_duration:
+        spans[1][0] = 0
+        spans.pop(0)
+
+    # Absorbed frames may outvote a span's first label; neighbours can then agree
+    merged = []
+    for start, end in spans:
+        label = Counter(labels[start:end]).most_common(1)[0][0]
+        if merged and merged[-1][0] == label:
+            merged[-1][2] = end
+        else:
+            merged.append([label, start, end])
+
+    segments = []
+    for label, start, end in merged:
+        in_label = labels[start:end] == label
+        matching = confidences[start:end][in_label]
+        matching = matching[~np.isnan(matching)]
+        confidence = float(matching.mean()) if matching.size else float(in_label.mean())
+        segments.append({
+            "label": str(label),
+            "start": round(float(timestamps[start]), 2),
+            "end": round(end_time(end), 2),
+            "frames": end - start,
+            "confidence": round(confidence * 100, 2),
+        })
+    return segments
+
+
+def summarize_timeline(labels, confidences, timestamps):
+    """summarize_predictions over the per-frame labels, plus the pose segments."""
+    result = summarize_predictions(list(labels))
+    result["segments"] = build_segments(labels, confidences, timestamps)
+    return result
+
+
+# ========== Early Exit ==========
+
+# Most uploads hold a single pose and the vote is settled long before the clip ends.
+# With early_exit_z set, the running vote is checked every EARLY_EXIT_CHECK_EVERY poses
+# and decoding stops once both the winning label and the correct/incorrect verdict are
+# beyond `early_exit_z` standard errors of changing.
+VERDICT_SCORE = 60
+EARLY_EXIT_MIN_FRAMES = 30
+EARLY_EXIT_CHECK_EVERY = 15
+
+
+def vote_converged(counts, z):
+    """
+    True when the leading label beats the runner-up by more than `z` standard errors
+    (sign test) and its share is more than `z` standard errors away from VERDICT_SCORE.
+    """
+    total = sum(counts.values())
+    if total < EARLY_EXIT_MIN_FRAMES:
+        return False
+
+    ranked = counts.most_common(2)
+    leader = ranked[0][1]
+    runner_up = ranked[1][1] if len(ranked) > 1 else 0
+    if leader - runner_up <= z * math.sqrt(leader + runner_up):
+        return False
+
+    share = leader / total
+    return abs(share - VERDICT_SCORE / 100.0) > z * math.sqrt(share * (1 - share) / total)
+
+
+def vote_monitor(classifier, z):
+    """
+    stop_check for collect_video_landmarks: classifies only the poses found since the
+    last call and tests the running vote. monitor.converged records whether it fired.
+    """
+    counts = Counter()
+    classified = [0]
+
+    def monitor(landmarks):
+        counts.update(classify_landmark_matrix(video_features(landmarks[classified[0]:]), classifier))
+        classified[0] = landmarks.shape[0]
+        monitor.converged = vote_converged(counts, z)
+        return monitor.converged
+
+    monitor.converged = False
+    return monitor
+
+
+def process_video_batched(video_path, stride=1, target_fps=None, progress=None, keep_landmarks=False,
+                          early_exit_z=None):
+    """
+    Batched variant of process_video: gathers landmarks for the sampled frames into one
+    matrix and classifies them in a single call. With stride=1 the vote is the same as
+    process_video; a larger stride or a target_fps trades frames for speed. The result
+    also lists the pose "segments" found along the video.
+    Uses its own Pose tracker, so concurrent calls are safe. The SVM version is fixed at
+    the start, so a model reload during the pass does not mix versions.
+    With keep_landmarks=True the result also carries "landmarks": (landmarks, timestamps
+    in seconds), for the caller to persist. early_exit_z enables the early exit above;
+    "frames_processed" and "stopped_early" in the result show what it saved.
+    """
+    svm = current_version("svm")
+    if svm is None:
+        return summary_failure("SVM model not loaded")
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return summary_failure("Invalid video path")
+
+    try:
+        step = sampling_stride(cap, stride, target_fps)
+        native_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        monitor = vote_monitor(svm.model, early_exit_z) if early_exit_z else None
+        with create_pose_estimator() as estimator:
+            landmarks, frame_indices, frames_decoded = collect_video_landmarks(
+                cap, estimator, stride=step, progress=progress,
+                stop_check=monitor, check_every=EARLY_EXIT_CHECK_EVERY
+            )
+    finally:
+        cap.release()
+
+    timestamps = frame_timestamps(frame_indices, native_fps)
+    labels, confidences = classify_frames(video_features(landmarks), svm.model)
+    result = summarize_timeline(labels, confidences, timestamps)
+    result["frames_sampled_every"] = step
+    result["frames_processed"] = frames_decoded
+    result["stopped_early"] = bool(monitor and monitor.converged)
+    result["model_version"] = svm.version
+    if keep_landmarks:
+        result["landmarks"] = (landmarks, timestamps)
+    return result
+
+
+def frame_timestamps(frame_indices, fps):
+    """Seconds from the start of the video for each frame index (frame numbers if fps is unknown)."""
+    if fps and fps > 0:
+        return frame_indices / float(fps)
+    return frame_indices.astype(np.float64)
+
 # ========== RF Pose Prediction (Live Frame) ==========
 
 def predict_live_pose(landmarks):
+    rf_classifier = get_rf_classifier()
     if rf_classifier is None:
         return None, 0.0
-    prediction = rf_classifier.predict([landmarks])[0]
-    probas = rf_classifier.predict_proba([landmarks])[0]
+    row = np.asarray(landmarks, dtype=np.float32).reshape(1, -1)
+    with span("classify"):
+        prediction = rf_classifier.predict(row)[0]
+        probas = rf_classifier.predict_proba(row)[0]
     confidence = round(np.max(probas) * 100, 2)
     return prediction, confidence
 
-def process_live_frame(frame):
+
+def predict_live_proba(landmarks):
+    """Class probabilities for one landmark vector, ordered like the RF model's classes_."""
+    rf_classifier = get_rf_classifier()
     if rf_classifier is None:
-        return summary_failure("Random Forest model not loaded")
+        return None
+    with span("classify"):
+        return rf_classifier.predict_proba(np.asarray(landmarks, dtype=np.float32).reshape(1, -1))[0]
+
 
-    image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = pose.process(image_rgb)
-    landmarks = extract_landmarks(results, mode="live")
 
-    print(f"🧪 Landmark length: {len(landmarks) if landmarks is not None else 'None'}")
+def process_live_landmarks(landmarks):
+    """Classify one 99-value landmark vector (already extracted, e.g. on the client)."""
+    if get_rf_classifier() is None:
+        return summary_failure("Random Forest model not loaded")
 
-    if landmarks is not None and len(landmarks) == 99:
+    if landmarks is not None and len(landmarks) == LANDMARK_VALUES_LIVE:
         pred_class, confidence = predict_live_pose(landmarks)
         feedback_msg = FEEDBACK.get(str(pred_class).lower(), "👍 Good attempt!")
         verdict = "✅ Live pose detected!" if confidence >= 60 else "❌ Low confidence in prediction"
@@ -160,6 +561,24 @@ def process_live_frame(frame):
     else:
         return summary_failure("No pose detected in frame")
 
+
+LIVE_LEASE_TIMEOUT = 2.0  # seconds a live frame waits for a free Pose tracker
+
+
+def process_live_frame(frame, session_key=None):
+    """Classify one camera frame. Pass the camera session id as `session_key` to keep tracking."""
+    if get_rf_classifier() is None:
+        return summary_failure("Random Forest model not loaded")
+
+    with span("color_convert"):
+        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    with leased_pose(session_key, timeout=LIVE_LEASE_TIMEOUT) as pose:
+        with span("pose"):
+            results = pose.process(image_rgb)
+        landmarks = extract_landmarks(results, mode="live", out=_live_buffer())
+
+    return process_live_landmarks(landmarks)
+
 # ========== CLI Debug Mode ==========
 
 if __name__ == "__main__":
@@ -185,7 +604,7 @@ if __name__ == "__main__":
             if not ret:
                 print("❌ Failed to read frame from webcam.")
                 break
-            result = process_live_frame(frame)
+            result = process_live_frame(frame, session_key="cli")
             cv2.imshow("Live Yoga Pose", frame)
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
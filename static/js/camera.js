@@ -3,6 +3,8 @@ let stream = null;
 let intervalId = null;
 let isAnalyzing = false;
 let showSkeleton = false;
+let liveSocket = null;
+let frameSeq = 0;
 
 const emojiEl = document.getElementById('camera-emoji');
 
@@ -13,12 +15,34 @@ async function loadModel() {
   );
 }
 
-async function fetchBackendFeedback(frameData) {
+// The server classifier uses the 33 BlazePose landmarks. When the detector gives us those,
+// send the keypoints alone; otherwise (MoveNet has 17) send the raw JPEG bytes.
+function buildLiveRequest(pose, video) {
+  if (pose.keypoints.length === 33) {
+    const values = new Float32Array(33 * 3);
+    pose.keypoints.forEach((kp, i) => {
+      values[i * 3] = kp.x / video.videoWidth;
+      values[i * 3 + 1] = kp.y / video.videoHeight;
+      values[i * 3 + 2] = kp.score !== undefined ? kp.score : 1;
+    });
+    return Promise.resolve({ contentType: 'application/x-pose-keypoints', body: values.buffer });
+  }
+
+  const tempCanvas = document.createElement('canvas');
+  tempCanvas.width = video.videoWidth;
+  tempCanvas.height = video.videoHeight;
+  tempCanvas.getContext('2d').drawImage(video, 0, 0);
+  return new Promise(resolve => {
+    tempCanvas.toBlob(blob => resolve({ contentType: 'image/jpeg', body: blob }), 'image/jpeg', 0.8);
+  });
+}
+
+async function fetchBackendFeedback(liveRequest) {
   try {
-    const res = await fetch('/predict_live_frame', {
+    const res = await fetch('/predict_live', {
       method: 'POST',
-      headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ frame: frameData })
+      headers: { 'Content-Type': liveRequest.contentType },
+      body: liveRequest.body
     });
 
     const data = await res.json();
@@ -28,15 +52,7 @@ async function fetchBackendFeedback(frameData) {
     const confidence = data.confidence !== undefined ? `${data.confidence.toFixed(1)}%` : 'N/A';
     const correctness = data.correctness || (data.confidence < 50 ? 'Low confidence in prediction' : 'High confidence');
 
-    let feedbackItems = [];
-
-    if (Array.isArray(data.feedback)) {
-      feedbackItems = data.feedback;
-    } else if (typeof data.feedback === 'string') {
-      feedbackItems = [data.feedback];
-    } else if (typeof data.feedback === 'object' && data.feedback !== null) {
-      feedbackItems = Object.values(data.feedback);
-    }
+    const feedbackItems = feedbackItemsFrom(data.feedback);
 
     return [
       ...feedbackItems.map(item => `- ${item}`)
@@ -47,6 +63,42 @@ async function fetchBackendFeedback(frameData) {
   }
 }
 
+function feedbackItemsFrom(feedback) {
+  if (Array.isArray(feedback)) return feedback;
+  if (typeof feedback === 'string') return [feedback];
+  if (typeof feedback === 'object' && feedback !== null) return Object.values(feedback);
+  return [];
+}
+
+// Live session over a WebSocket: the server keeps a pose tracker and smoothed labels for
+// this camera. If the socket is unavailable we fall back to one POST per frame.
+function openLiveSocket() {
+  const scheme = window.location.protocol === 'https:' ? 'wss' : 'ws';
+  const socket = new WebSocket(`${scheme}://${window.location.host}/live/ws`);
+  socket.binaryType = 'arraybuffer';
+
+  socket.onmessage = (event) => {
+    const data = JSON.parse(event.data);
+    if (data.error) {
+      showFeedbackList([`Error: ${data.error}`]);
+    } else if (data.feedback) {
+      showFeedbackList(feedbackItemsFrom(data.feedback).map(item => `- ${item}`));
+    }
+  };
+  socket.onclose = () => { liveSocket = null; };
+  socket.onerror = () => socket.close();
+  return socket;
+}
+
+function sendOverSocket(liveRequest) {
+  frameSeq += 1;
+  if (liveRequest.contentType === 'application/x-pose-keypoints') {
+    liveSocket.send(JSON.stringify({ seq: frameSeq, keypoints: Array.from(new Float32Array(liveRequest.body)) }));
+  } else {
+    liveSocket.send(liveRequest.body);
+  }
+}
+
 function drawSkeleton(pose, ctx) {
   const adjacentPairs = [
     [0, 1], [1, 3], [0, 2], [2, 4],
@@ -86,6 +138,8 @@ function startAnalysis(video, canvas) {
   const container = document.getElementById('live-feedback-container');
   if (container) container.style.display = 'block';
 
+  if (!liveSocket && 'WebSocket' in window) liveSocket = openLiveSocket();
+
   intervalId = setInterval(async () => {
     if (!detector || !video.videoWidth) return;
 
@@ -97,15 +151,13 @@ function startAnalysis(video, canvas) {
     if (poses.length > 0) {
       if (showSkeleton) drawSkeleton(poses[0], ctx);
 
-      const tempCanvas = document.createElement('canvas');
-      tempCanvas.width = video.videoWidth;
-      tempCanvas.height = video.videoHeight;
-      const tempCtx = tempCanvas.getContext('2d');
-      tempCtx.drawImage(video, 0, 0);
-      const frameData = tempCanvas.toDataURL('image/jpeg', 0.8);
-
-      const feedback = await fetchBackendFeedback(frameData);
-      showFeedbackList(feedback);
+      const liveRequest = await buildLiveRequest(poses[0], video);
+      if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+        sendOverSocket(liveRequest);
+      } else {
+        const feedback = await fetchBackendFeedback(liveRequest);
+        showFeedbackList(feedback);
+      }
     } else {
       showFeedbackList(['❌ No pose detected']);
     }
@@ -118,6 +170,11 @@ function stopAnalysis(canvas) {
     intervalId = null;
   }
 
+  if (liveSocket) {
+    liveSocket.close();
+    liveSocket = null;
+  }
+
   const ctx = canvas.getContext('2d');
   ctx.clearRect(0, 0, canvas.width, canvas.height);
 
@@ -9,6 +9,50 @@ async function loadPoseModel() {
 
 loadPoseModel();
 
+// Resumable chunked upload: the file goes up as raw binary slices, so neither the
+// browser nor the server ever holds it whole. Retries resume from the server's offset.
+async function uploadInChunks(blob, filename, onProgress) {
+    const startRes = await fetch('/uploads/chunked', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'Accept': 'application/json' },
+        body: JSON.stringify({ filename: filename, size: blob.size })
+    });
+    const upload = await startRes.json();
+    if (!startRes.ok) throw new Error(upload.error || 'Upload failed to start');
+
+    let offset = 0;
+    let retries = 0;
+    while (offset < blob.size) {
+        const chunk = blob.slice(offset, offset + upload.chunk_size);
+        try {
+            const res = await fetch(`${upload.upload_url}?offset=${offset}`, {
+                method: 'PUT',
+                headers: { 'Content-Type': 'application/octet-stream' },
+                body: chunk
+            });
+            const data = await res.json();
+            if (res.ok) {
+                offset = data.received;
+                retries = 0;
+                if (onProgress) onProgress(offset / blob.size);
+                continue;
+            }
+            if (data.received === undefined || res.status === 413) throw new Error(data.error || 'Upload failed');
+            offset = data.received;  // server tells us where to resume
+        } catch (err) {
+            if (++retries > 3) throw err;
+            const status = await (await fetch(upload.upload_url)).json();
+            offset = status.received;
+        }
+    }
+
+    const doneRes = await fetch(upload.complete_url, { method: 'POST' });
+    const done = await doneRes.json();
+    if (!doneRes.ok) throw new Error(done.error || 'Upload failed to complete');
+    return done;
+}
+window.uploadInChunks = uploadInChunks;
+
 document.addEventListener('DOMContentLoaded', function () {
     // Basic DOM element refs
     const methodBtns = document.querySelectorAll('.method-btn');
@@ -262,5 +306,22 @@ document.addEventListener('DOMContentLoaded', function () {
             submitBtn.disabled = true;
             submitBtn.textContent = 'Analyzing...';
         }
+
+        // Videos go through the chunked upload API instead of one multipart body
+        const file = fileInput.files && fileInput.files[0];
+        if (method !== 'camera' && file && file.type.startsWith('video/')) {
+            e.preventDefault();
+            uploadInChunks(file, file.name, fraction => {
+                if (submitBtn) submitBtn.textContent = `Uploading ${Math.round(fraction * 100)}%`;
+            }).then(done => {
+                window.location.href = done.videos_url;
+            }).catch(err => {
+                alert(err.message);
+                if (submitBtn) {
+                    submitBtn.disabled = false;
+                    submitBtn.textContent = 'Analyze';
+                }
+            });
+        }
     });
 });
@@ -34,4 +34,61 @@ document.addEventListener('DOMContentLoaded', () => {
             selectedForm = null;
         }
     });
+
+    // Analyze runs as a background job: enqueue, poll progress, then open the result
+    document.querySelectorAll('.analyze-form').forEach(form => {
+        form.addEventListener('submit', async (e) => {
+            e.preventDefault();
+            const button = form.querySelector('.analyze-btn');
+            button.disabled = true;
+            button.textContent = 'Queued...';
+
+            try {
+                const res = await fetch(form.action, {
+                    method: 'POST',
+                    headers: { 'Accept': 'application/json' }
+                });
+                const job = await res.json();
+                if (!res.ok) throw new Error(job.error || 'Analysis failed to start');
+                // Cached results come back already done
+                if (job.status === 'done' && job.result_url) {
+                    window.location.href = job.result_url;
+                    return;
+                }
+                pollJob(job.progress_url, job.status_url, button);
+            } catch (err) {
+                alert(err.message);
+                button.disabled = false;
+                button.textContent = 'Analyze';
+            }
+        });
+    });
+
+    function pollJob(progressUrl, statusUrl, button) {
+        const timer = setInterval(async () => {
+            try {
+                const progress = await (await fetch(progressUrl)).json();
+                if (progress.status === 'running' || progress.status === 'queued') {
+                    button.textContent = progress.percent !== null && progress.percent !== undefined
+                        ? `Analyzing ${Math.round(progress.percent)}%`
+                        : 'Analyzing...';
+                    return;
+                }
+
+                clearInterval(timer);
+                const job = await (await fetch(statusUrl)).json();
+                if (job.status === 'done' && job.result_url) {
+                    window.location.href = job.result_url;
+                } else {
+                    alert(job.error || 'Analysis failed');
+                    button.disabled = false;
+                    button.textContent = 'Analyze';
+                }
+            } catch (err) {
+                clearInterval(timer);
+                button.disabled = false;
+                button.textContent = 'Analyze';
+            }
+        }, 1000);
+    }
 });
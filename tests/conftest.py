@@ -0,0 +1,21 @@
+import pytest
+
+import db_connection
+import db_services
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the connection pool at an empty database file for one test."""
+    db_connection.close_all_connections()
+    monkeypatch.setattr(db_connection, "_db_path", str(tmp_path / "test.db"))
+    monkeypatch.setattr(db_services, "_tables_ready", False)
+    yield db_connection.get_db_path()
+    db_connection.close_all_connections()
+
+
+@pytest.fixture
+def user_id(db):
+    db_services.ensure_tables()
+    db_services.add_user("Asha", "asha@example.com", "x" * 64)
+    return db_services.get_user_credentials("asha@example.com")["id"]
@@ -0,0 +1,99 @@
+import hashlib
+
+import pytest
+
+import db_services
+from services import credentials
+
+
+@pytest.fixture(autouse=True)
+def cheap_kdf(monkeypatch):
+    # Real cost parameters make every hash take ~50 ms; the format is what is under test
+    monkeypatch.setattr(credentials, "SCRYPT_N", 2 ** 10)
+    monkeypatch.setattr(credentials, "PBKDF2_ITERATIONS", 1000)
+
+
+def _legacy(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def test_legacy_sha256_verifies_and_asks_for_rehash():
+    assert credentials.verify_password("secret", _legacy("secret")) == (True, True)
+    assert credentials.verify_password("wrong", _legacy("secret")) == (False, False)
+
+
+def test_scrypt_round_trip():
+    stored = credentials.hash_password("secret")
+
+    assert stored.startswith("scrypt$1024$8$1$")
+    assert credentials.verify_password("secret", stored) == (True, False)
+    assert credentials.verify_password("wrong", stored) == (False, False)
+
+
+def test_pbkdf2_round_trip(monkeypatch):
+    monkeypatch.setattr(credentials, "PASSWORD_KDF", "pbkdf2")
+    stored = credentials.hash_password("secret")
+
+    assert stored.startswith("pbkdf2_sha256$1000$")
+    assert credentials.verify_password("secret", stored) == (True, False)
+    assert credentials.verify_password("wrong", stored) == (False, False)
+
+
+def test_outdated_parameters_ask_for_rehash(monkeypatch):
+    stored = credentials.hash_password("secret")
+    monkeypatch.setattr(credentials, "SCRYPT_N", 2 ** 11)
+
+    assert credentials.verify_password("secret", stored) == (True, True)
+
+
+def test_hash_from_the_other_kdf_asks_for_rehash(monkeypatch):
+    stored = credentials.hash_password("secret")
+    monkeypatch.setattr(credentials, "PASSWORD_KDF", "pbkdf2")
+
+    assert credentials.verify_password("secret", stored) == (True, True)
+
+
+@pytest.mark.parametrize("stored", [
+    "",
+    "secret",
+    "bcrypt$2b$12$abc",
+    "scrypt$not-a-number$8$1$c2FsdA==$aGFzaA==",
+    "scrypt$1000$8$1$c2FsdA==$aGFzaA==",  # n must be a power of two
+    "scrypt$1024$8$1$!!!$aGFzaA==",
+    "pbkdf2_sha256$1000$c2FsdA==",
+    "pbkdf2_sha256$many$c2FsdA==$aGFzaA==",
+])
+def test_malformed_hashes_never_match(stored):
+    assert credentials.verify_password("secret", stored) == (False, False)
+
+
+def test_login_rehashes_a_legacy_password(user_id):
+    db_services.update_user_password(user_id, _legacy("secret"))
+
+    assert credentials.authenticate("asha@example.com", "secret") == (user_id, "Asha")
+
+    stored = db_services.get_user_credentials("asha@example.com")["password"]
+    assert stored.startswith("scrypt$")
+    assert credentials.verify_password("secret", stored) == (True, False)
+    assert credentials.authenticate("asha@example.com", "secret") == (user_id, "Asha")
+
+
+def test_failed_login_keeps_the_stored_hash(user_id):
+    db_services.update_user_password(user_id, _legacy("secret"))
+
+    assert credentials.authenticate("asha@example.com", "wrong") is None
+    assert db_services.get_user_credentials("asha@example.com")["password"] == _legacy("secret")
+
+
+def test_unknown_email_is_rejected(db):
+    db_services.ensure_tables()
+    assert credentials.authenticate("nobody@example.com", "secret") is None
+
+
+def test_register_then_login(db):
+    db_services.ensure_tables()
+    credentials.register_user("Asha", "asha@example.com", "secret")
+
+    assert credentials.authenticate("asha@example.com", "secret") is not None
+    with pytest.raises(ValueError):
+        credentials.register_user("Asha", "asha@example.com", "other")
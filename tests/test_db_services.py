@@ -0,0 +1,154 @@
+import sqlite3
+
+import pytest
+
+import db_services
+from db_connection import get_db_connection
+
+
+def _prediction(video_id, model_version="v1", pose_name="Tadasana", segments=None):
+    return dict(video_id=video_id, pose_name=pose_name, score=80.0, confidence=80.0, is_correct=True,
+                verdict="ok", feedback=["Keep your spine straight"], model_version=model_version,
+                segments=segments)
+
+
+def _add_video(user_id, content_hash="a" * 64):
+    return db_services.save_video_ref("v.mp4", f"static/videos/{content_hash}.mp4", user_id, content_hash, 10)[0]
+
+
+def _count(table):
+    conn = get_db_connection()
+    count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    conn.close()
+    return count
+
+
+def test_migration_drops_duplicate_and_orphan_predictions(db):
+    # A database from before the migrations: no constraints, duplicates and orphans allowed
+    conn = sqlite3.connect(db)
+    conn.executescript('''
+        CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+                            email TEXT UNIQUE NOT NULL, password TEXT NOT NULL);
+        CREATE TABLE videos (id INTEGER PRIMARY KEY AUTOINCREMENT, fileName TEXT NOT NULL,
+                             url TEXT NOT NULL, user_id INTEGER NOT NULL);
+        CREATE TABLE predictions (id INTEGER PRIMARY KEY AUTOINCREMENT, video_id INTEGER NOT NULL,
+                                  pose_name TEXT NOT NULL, score REAL, confidence REAL, is_correct INTEGER,
+                                  verdict TEXT, feedback TEXT, model_version TEXT);
+        INSERT INTO users (id, name, email, password) VALUES (1, 'Asha', 'asha@example.com', 'x');
+        INSERT INTO videos (id, fileName, url, user_id) VALUES (1, 'v.mp4', 'static/videos/v.mp4', 1);
+        INSERT INTO predictions (id, video_id, pose_name, model_version) VALUES
+            (1, 1, 'Tadasana', 'v1'),
+            (2, 1, 'Vrikshasana', 'v1'),
+            (3, 1, 'Tadasana', NULL),
+            (4, 99, 'Tadasana', 'v1');
+    ''')
+    conn.close()
+
+    db_services.ensure_tables()
+
+    conn = get_db_connection()
+    rows = conn.execute("SELECT id, pose_name, model_version FROM predictions ORDER BY id").fetchall()
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    # The newest row per (video, model version) survives; the orphan of video 99 is gone
+    assert [tuple(row) for row in rows] == [(2, 'Vrikshasana', 'v1'), (3, 'Tadasana', '')]
+    assert version == db_services.MIGRATIONS[-1][0]
+
+    with pytest.raises(sqlite3.IntegrityError):
+        conn = get_db_connection()
+        try:
+            conn.execute("INSERT INTO predictions (video_id, pose_name, model_version) VALUES (1, 'x', 'v1')")
+        finally:
+            conn.close()
+
+
+def test_deleting_a_video_cascades_to_its_rows(user_id):
+    video_id = _add_video(user_id)
+    segments = [{"label": "Tadasana", "start": 0.0, "end": 1.5, "frames": 12, "confidence": 0.9}]
+    prediction_id = db_services.upsert_prediction(**_prediction(video_id, segments=segments))
+    db_services.create_analysis_job(video_id, user_id)
+    db_services.save_landmark_track(video_id, "/tmp/v.landmarks.npy", 12, 1, "{}")
+    assert db_services.get_prediction_segments(prediction_id)
+
+    released = db_services.delete_video_by_id(video_id)
+
+    assert released == {"url": f"static/videos/{'a' * 64}.mp4", "unreferenced": True}
+    for table in ("predictions", "prediction_segments", "analysis_jobs", "landmark_tracks", "video_blobs"):
+        assert _count(table) == 0, table
+
+
+def test_shared_blob_stays_referenced_until_the_last_video_goes(user_id):
+    first, second = _add_video(user_id), _add_video(user_id)
+
+    assert db_services.delete_video_by_id(first)["unreferenced"] is False
+    assert db_services.delete_video_by_id(second)["unreferenced"] is True
+    assert db_services.delete_video_by_id(second) is None
+
+
+def test_unlink_runs_before_the_delete_commits(user_id):
+    video_id = _add_video(user_id)
+    seen = []
+
+    def unlink(url):
+        # Another connection still sees the row: the file goes while the write lock is held
+        conn = get_db_connection()
+        seen.append((url, conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]))
+        conn.close()
+
+    db_services.delete_video_by_id(video_id, unlink=unlink)
+
+    assert seen == [(f"static/videos/{'a' * 64}.mp4", 1)]
+    assert _count("videos") == 0
+
+
+def test_new_reference_reuses_the_recorded_url(user_id):
+    first = db_services.save_video_ref("a.mp4", "static/videos/first.mp4", user_id, "b" * 64, 10)
+    second = db_services.save_video_ref("b.webm", "static/videos/second.webm", user_id, "b" * 64, 10)
+
+    assert first[1] == second[1] == "static/videos/first.mp4"
+    assert db_services.get_video_by_id(second[0])["url"] == "static/videos/first.mp4"
+
+
+def test_upsert_overwrites_per_model_version(user_id):
+    video_id = _add_video(user_id)
+    first = db_services.upsert_prediction(**_prediction(video_id))
+    again = db_services.upsert_prediction(**_prediction(video_id, pose_name="Vrikshasana"))
+    other = db_services.upsert_prediction(**_prediction(video_id, model_version="v2"))
+
+    assert again == first and other != first
+    assert db_services.get_prediction_by_id(first)["pose_name"] == "Vrikshasana"
+    assert db_services.get_prediction_by_id(first)["feedback"] == ["Keep your spine straight"]
+
+
+def test_batch_with_a_foreign_key_violation_writes_nothing(user_id):
+    video_id = _add_video(user_id)
+
+    with pytest.raises(sqlite3.IntegrityError):
+        db_services.upsert_predictions([_prediction(video_id), _prediction(video_id + 1000)])
+    assert _count("predictions") == 0
+
+
+def test_prediction_writer_retries_a_failed_batch_row_by_row(user_id, monkeypatch):
+    pytest.importorskip("numpy")  # analysis_jobs imports the landmark store
+    from services import analysis_jobs
+
+    video_id = _add_video(user_id)
+    writer = analysis_jobs.PredictionWriter.__new__(analysis_jobs.PredictionWriter)  # no thread
+    batch = [(_prediction(video_id), analysis_jobs.Future()),
+             (_prediction(video_id + 1000), analysis_jobs.Future())]
+
+    writer._write(batch)
+
+    assert db_services.get_prediction_by_id(batch[0][1].result())["video_id"] == video_id
+    assert isinstance(batch[1][1].exception(), sqlite3.IntegrityError)
+
+
+def test_closing_a_connection_twice_returns_it_to_the_pool_once(db):
+    conn = get_db_connection()
+    conn.close()
+    conn.close()
+
+    first, second = get_db_connection(), get_db_connection()
+    assert first is conn and second is not conn
+    first.close()
+    second.close()
@@ -0,0 +1,25 @@
+import pytest
+
+flask = pytest.importorskip("flask")
+pytest.importorskip("cv2")
+
+from routes import live_routes  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    app = flask.Flask(__name__)
+    app.secret_key = 'test'
+    app.register_blueprint(live_routes.live_bp)
+    return app.test_client()
+
+
+def test_pool_stats_need_a_signed_in_user(client):
+    assert client.get('/live/pool-stats').status_code == 401
+
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+    response = client.get('/live/pool-stats')
+
+    assert response.status_code == 200
+    assert isinstance(response.json, dict)
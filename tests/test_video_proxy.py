@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from services import video_proxy  # noqa: E402
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "clip.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30.0, (64, 48))
+    if not writer.isOpened():
+        pytest.skip("no mp4 encoder in this OpenCV build")
+    for i in range(30):
+        writer.write(np.full((48, 64, 3), i * 8, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_build_proxy_writes_a_reduced_copy(video):
+    proxy = video_proxy.build_proxy(video)
+
+    assert proxy == video_proxy.proxy_path_for(video)
+    assert video_proxy.analysis_source(video) == proxy
+    cap = cv2.VideoCapture(proxy)
+    assert cap.get(cv2.CAP_PROP_FPS) == pytest.approx(15.0)
+    cap.release()
+
+
+def test_existing_proxy_is_not_transcoded_again(video, monkeypatch):
+    proxy = video_proxy.build_proxy(video)
+    built_at = os.path.getmtime(proxy)
+
+    def no_decode(path):
+        raise AssertionError("transcoded an up-to-date proxy again")
+
+    monkeypatch.setattr(video_proxy.cv2, "VideoCapture", no_decode)
+    monkeypatch.setattr(video_proxy, "_build_in_background", no_decode)
+
+    assert video_proxy.build_proxy(video) == proxy
+    video_proxy.schedule_proxy(video)
+    assert os.path.getmtime(proxy) == built_at
@@ -0,0 +1,103 @@
+import io
+import os
+
+import pytest
+
+pytest.importorskip("cv2")
+flask = pytest.importorskip("flask")
+
+from routes import video_routes  # noqa: E402
+from services import video_storage  # noqa: E402
+from services.video_proxy import proxy_path_for, PROXY_VERSION  # noqa: E402
+
+RESULT = {"label": "Tadasana", "score": 90.0, "verdict": "", "feedback": "", "frames_sampled_every": 1}
+
+
+class FakeQueue:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, video_id, user_id, file_path, content_hash=None, **options):
+        self.submitted.append((file_path, content_hash))
+        return video_routes.create_analysis_job(video_id, user_id)
+
+
+@pytest.fixture
+def app(user_id, tmp_path, monkeypatch):
+    app = flask.Flask(__name__, root_path=str(tmp_path))
+    app.secret_key = 'test'
+    app.config.update(UPLOAD_FOLDER=str(tmp_path / "static" / "videos"), ANALYSIS_USE_PROXY=True)
+    app.register_blueprint(video_routes.video_bp)
+
+    queue = FakeQueue()
+    monkeypatch.setattr(video_routes, "get_job_queue", lambda *args, **kwargs: queue)
+    monkeypatch.setattr(video_routes, "store_analysis_result", lambda video_id, result: None)
+    app.queue = queue
+    return app
+
+
+@pytest.fixture
+def client(app, user_id):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['user'] = 'asha@example.com'
+        session['user_id'] = user_id
+    return client
+
+
+@pytest.fixture
+def video(app, user_id):
+    """(video id, stored path, content hash), with a finished proxy next to the file."""
+    video_id, path = video_storage.store_stream(io.BytesIO(b"pose video"), app.config['UPLOAD_FOLDER'],
+                                                user_id, "v.mp4")
+    proxy = proxy_path_for(path)
+    os.makedirs(os.path.dirname(proxy))
+    with open(proxy, 'wb') as f:
+        f.write(b"proxy")
+    return video_id, path, os.path.basename(path).split(".")[0]
+
+
+def _analyze(client, video_id):
+    return client.post(f"/analyze/{video_id}", headers={"Accept": "application/json"})
+
+
+def test_original_resolution_result_wins_over_a_later_proxy(app, client, video, monkeypatch):
+    video_id, _, content_hash = video
+    lookups = []
+
+    def lookup(key, **options):
+        lookups.append(key)
+        return dict(RESULT) if key == content_hash else None
+
+    monkeypatch.setattr(video_routes.result_cache, "lookup", lookup)
+
+    response = _analyze(client, video_id)
+
+    assert response.status_code == 200 and response.json["status"] == "done"
+    assert lookups == [content_hash]
+    assert app.queue.submitted == []
+
+
+def test_original_resolution_track_is_reclassified_before_the_proxy(app, client, video, monkeypatch):
+    video_id, path, _ = video
+    monkeypatch.setattr(video_routes.result_cache, "lookup", lambda key, **options: None)
+    monkeypatch.setattr(video_routes.result_cache, "store", lambda key, result, **options: None)
+    monkeypatch.setattr(video_routes.landmark_store, "find_track",
+                        lambda vid, source, **options: {"source": source} if source == path else None)
+    monkeypatch.setattr(video_routes.landmark_store, "reclassify", lambda track: dict(RESULT))
+
+    response = _analyze(client, video_id)
+
+    assert response.status_code == 200
+    assert app.queue.submitted == []
+
+
+def test_new_pass_reads_the_proxy(app, client, video, monkeypatch):
+    video_id, path, content_hash = video
+    monkeypatch.setattr(video_routes.result_cache, "lookup", lambda key, **options: None)
+    monkeypatch.setattr(video_routes.landmark_store, "find_track", lambda vid, source, **options: None)
+
+    response = _analyze(client, video_id)
+
+    assert response.status_code == 202
+    assert app.queue.submitted == [(proxy_path_for(path), f"{content_hash}:proxy{PROXY_VERSION}")]
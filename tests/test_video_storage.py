@@ -0,0 +1,84 @@
+import io
+import os
+
+import pytest
+
+import db_services
+from services import video_storage
+
+
+@pytest.fixture
+def storage(user_id, tmp_path):
+    """(upload folder, root path) laid out like the app: root/static/videos."""
+    upload_folder = tmp_path / "static" / "videos"
+    upload_folder.mkdir(parents=True)
+    return str(upload_folder), str(tmp_path)
+
+
+def _blob(content_hash):
+    conn = db_services.get_db_connection()
+    row = conn.execute("SELECT refcount FROM video_blobs WHERE content_hash = ?", (content_hash,)).fetchone()
+    conn.close()
+    return row[0] if row else None
+
+
+def _upload(storage, user_id, data=b"pose video", filename="v.mp4"):
+    return video_storage.store_stream(io.BytesIO(data), storage[0], user_id, filename)
+
+
+def test_same_bytes_are_stored_once(storage, user_id):
+    first_id, first_path = _upload(storage, user_id)
+    second_id, second_path = _upload(storage, user_id, filename="other.webm")
+
+    assert first_id != second_id and first_path == second_path
+    assert os.listdir(os.path.join(storage[0], video_storage.INCOMING_DIR)) == []
+    content_hash = os.path.basename(first_path).split(".")[0]
+    assert _blob(content_hash) == 2
+
+    assert video_storage.delete_video(first_id, storage[1]) is None
+    assert os.path.exists(first_path)
+    assert video_storage.delete_video(second_id, storage[1]) == first_path
+    assert not os.path.exists(first_path)
+    assert _blob(content_hash) is None
+
+
+def test_upload_racing_the_last_delete_keeps_its_file(storage, user_id, monkeypatch):
+    # Worker A deletes the only video while worker B uploads the same bytes: A's
+    # transaction (decrement, unlink) lands just before B counts its reference
+    video_id, path = _upload(storage, user_id)
+    save_video_ref = db_services.save_video_ref
+
+    def delete_first(*args):
+        video_storage.delete_video(video_id, storage[1])
+        return save_video_ref(*args)
+
+    monkeypatch.setattr(video_storage, "save_video_ref", delete_first)
+    new_id, new_path = _upload(storage, user_id)
+
+    assert new_path == path and os.path.exists(path)
+    assert _blob(os.path.basename(path).split(".")[0]) == 1
+    assert db_services.get_video_by_id(new_id)
+
+
+def test_delete_after_an_upload_counted_its_reference_keeps_the_file(storage, user_id, monkeypatch):
+    video_id, path = _upload(storage, user_id)
+    save_video_ref = db_services.save_video_ref
+
+    def delete_after(*args):
+        saved = save_video_ref(*args)
+        assert video_storage.delete_video(video_id, storage[1]) is None
+        return saved
+
+    monkeypatch.setattr(video_storage, "save_video_ref", delete_after)
+    _, new_path = _upload(storage, user_id)
+
+    assert new_path == path and os.path.exists(path)
+
+
+def test_missing_file_is_restored_under_its_recorded_name(storage, user_id):
+    _, path = _upload(storage, user_id, filename="v.mp4")
+    os.remove(path)
+
+    _, new_path = _upload(storage, user_id, filename="v.webm")
+
+    assert new_path == path and os.path.exists(path)
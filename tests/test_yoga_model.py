@@ -0,0 +1,133 @@
+from types import SimpleNamespace
+
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+pytest.importorskip("joblib")
+
+from services import yoga_model  # noqa: E402
+
+
+class FakeCapture:
+    """Enough of cv2.VideoCapture for the pipeline: `count` frames whose pixels hold their index."""
+
+    def __init__(self, count, fps=10.0):
+        self.count = count
+        self.fps = fps
+        self.position = 0
+        self.released = False
+
+    def isOpened(self):
+        return not self.released
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self.count
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        return 0
+
+    def set(self, prop, value):
+        if prop != cv2.CAP_PROP_POS_FRAMES:
+            return False
+        self.position = int(value)
+        return True
+
+    def grab(self):
+        if self.position >= self.count:
+            return False
+        self.position += 1
+        return True
+
+    def read(self):
+        if self.position >= self.count:
+            return False, None
+        frame = np.full((4, 4, 3), self.position, dtype=np.uint8)
+        self.position += 1
+        return True, frame
+
+    def release(self):
+        self.released = True
+
+
+class FakeEstimator:
+    """Finds a pose on even frames only; every landmark's x is the frame index."""
+
+    def __init__(self):
+        self.frames_seen = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def process(self, image):
+        index = int(image[0, 0, 0])
+        self.frames_seen.append(index)
+        if index % 2:
+            return SimpleNamespace(pose_landmarks=None)
+        point = SimpleNamespace(x=float(index), y=0.5, visibility=1.0)
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=[point] * 33))
+
+
+class FakeClassifier:
+    """Tadasana for the first frames, Vrikshasana after; no predict_proba."""
+
+    def predict(self, matrix):
+        return np.array(["Tadasana" if row[0] < 12 else "Vrikshasana" for row in matrix], dtype=object)
+
+
+def test_collect_video_landmarks_keeps_frames_with_a_pose():
+    estimator = FakeEstimator()
+    progress = []
+
+    landmarks, frame_indices, frames_decoded = yoga_model.collect_video_landmarks(
+        FakeCapture(10), estimator, progress=lambda done, total: progress.append((done, total))
+    )
+
+    assert frames_decoded == 10
+    assert frame_indices.tolist() == [0, 2, 4, 6, 8]
+    assert landmarks.shape == (5,) + yoga_model.LANDMARK_SHAPE
+    assert landmarks[:, 0, 0].tolist() == [0, 2, 4, 6, 8]
+    assert progress[0] == (0, 10) and progress[-1] == (10, 10)
+
+
+@pytest.mark.parametrize("stride", [2, yoga_model.SEEK_MIN_STRIDE])
+def test_collect_video_landmarks_samples_every_stride_frame(stride):
+    estimator = FakeEstimator()
+
+    _, frame_indices, frames_decoded = yoga_model.collect_video_landmarks(FakeCapture(20), estimator, stride=stride)
+
+    assert estimator.frames_seen == list(range(0, 20, stride))
+    assert frames_decoded == len(estimator.frames_seen)
+    assert frame_indices.tolist() == [i for i in range(0, 20, stride) if i % 2 == 0]
+
+
+def test_collect_video_landmarks_covers_only_its_segment():
+    estimator = FakeEstimator()
+
+    _, frame_indices, _ = yoga_model.collect_video_landmarks(FakeCapture(20), estimator, start_frame=5, end_frame=11)
+
+    assert estimator.frames_seen == [5, 6, 7, 8, 9, 10]
+    assert frame_indices.tolist() == [6, 8, 10]
+
+
+def test_process_video_batched_votes_over_the_found_poses(monkeypatch):
+    monkeypatch.setattr(yoga_model.cv2, "VideoCapture", lambda path: FakeCapture(40))
+    monkeypatch.setattr(yoga_model, "create_pose_estimator", FakeEstimator)
+    monkeypatch.setattr(yoga_model, "current_version",
+                        lambda name: SimpleNamespace(model=FakeClassifier(), version="test-version"))
+
+    result = yoga_model.process_video_batched("video.mp4", keep_landmarks=True)
+
+    # 20 poses (even frames): 6 below frame 12, 14 from there on
+    assert result["label"] == "Vrikshasana"
+    assert result["score"] == 70.0
+    assert result["frames_processed"] == 40
+    assert result["frames_sampled_every"] == 1
+    assert result["model_version"] == "test-version"
+    assert [s["label"] for s in result["segments"]] == ["Tadasana", "Vrikshasana"]
+    landmarks, timestamps = result["landmarks"]
+    assert landmarks.shape[0] == 20 and timestamps[1] == pytest.approx(0.2)